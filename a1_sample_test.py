@@ -1,208 +1,1074 @@
-"""CSC148 Assignment 1: Sample tests
-
-=== CSC148 Fall 2018 ===
-Department of Computer Science,
-University of Toronto
-
-=== Module description ===
-This module contains sample tests for Assignment 1.
-
-Warning: This is an extremely incomplete set of tests!
-Add your own to practice writing tests and to be confident your code is correct.
-
-For more information on hypothesis (one of the testing libraries we're using),
-please see
-<https://www.teach.cs.toronto.edu/~csc148h/fall/software/hypothesis.html>.
-
-Note: this file is for support purposes only, and is not part of your
-submission.
-"""
-from algorithms import PushyPassenger, RandomAlgorithm, ShortSighted, RandomArrivals, FileArrivals
-from simulation import Simulation
-
-
-def test_random_arrival_generator_zero() -> None:
-    """Test the random arrival generator for two rounds: 0 and 5.
-
-    Note that this test just checks that the range of possible values
-    for the random people are correct.
-    """
-    max_floor = 5
-    num_per_round = 2
-    random_generator = RandomArrivals(max_floor, num_per_round)
-
-    for round_num in [0, 5]:
-        arrivals = random_generator.generate(round_num)
-        all_people = []
-        for floor, people in arrivals.items():
-            # Check that the floor is in the correct range.
-            assert 1 <= floor <= max_floor
-
-            all_people.extend(people)
-
-        # Check that the right number of people were generated.
-        assert len(all_people) == num_per_round
-
-        for p in all_people:
-            # Check floor boundaries
-            assert 1 <= p.start <= max_floor
-            assert 1 <= p.target <= max_floor
-
-            # Check that the start and target floors are different.
-            assert p.start != p.target
-
-
-def test_file_arrival_generator() -> None:
-    """Test the CSV arrival generator for the given sample_arrivals file.
-    """
-    max_floor = 5
-    file_generator = FileArrivals(max_floor, 'sample_arrivals.csv')
-
-    # First try round 0. Note that round numbering starts at 0,
-    # but there are no arrivals at round 0 according to the sample file.
-    round_zero = file_generator.generate(0)
-    for _, people in round_zero.items():
-        assert people == []
-
-    # Next try round 1. Two people arrive.
-    round_one = file_generator.generate(1)
-    for floor, people in round_one.items():
-        if floor == 1:
-            assert len(people) == 1
-            assert people[0].start == 1
-            assert people[0].target == 4
-        elif floor == 5:
-            assert len(people) == 1
-            assert people[0].start == 5
-            assert people[0].target == 3
-        else:
-            assert len(people) == 0
-
-    # Next try round 5. One person arrives.
-    round_five = file_generator.generate(5)
-    for floor, people in round_five.items():
-        if floor == 4:
-            assert len(people) == 1
-            assert people[0].start == 4
-            assert people[0].target == 2
-        else:
-            assert len(people) == 0
-
-
-def test_random_moving_algorithm() -> None:
-    """Test the random moving algorithm.
-
-    Note that while we can't exactly calculate every statistic, we can determine
-    whether the statistics have values that are in the right range.
-
-    (And that your simulation runs without crashing.)
-    """
-    config = {
-        'num_floors': 5,
-        'num_elevators': 2,
-        'elevator_capacity': 1,
-        # This is likely not used.
-        'num_people_per_round': 2,
-        'arrival_generator': FileArrivals(5, 'sample_arrivals.csv'),
-        'moving_algorithm': RandomAlgorithm(),
-        # Note that we aren't visualizing anything here.
-        # Your code should still work properly (and run a lot faster) with this
-        # set to False.
-        'visualize': False
-    }
-    sim = Simulation(config)
-    num_rounds = 10
-    results = sim.run(num_rounds)
-
-    # We can check these statistics exactly.
-    assert results['num_iterations'] == num_rounds
-    assert results['total_people'] == 4
-
-    # We can check ranges for this one.
-    assert 0 <= results['people_completed'] <= results['total_people']
-
-    # We can split up the remaining ones.
-    if results['people_completed'] == 0:
-        # If no person reached their target floor, report -1 (exact value).
-        assert results['max_time'] == -1
-        assert results['min_time'] == -1
-        assert results['avg_time'] == -1
-    else:
-        # Check ranges.
-        # Note that the minimum number of rounds it should take for someone to
-        # reach their target floor is *1*---it's impossible for someone to
-        # arrive and reach their target floor in the same round.
-        assert (1 <=
-                results['min_time'] <=
-                results['avg_time'] <=
-                results['max_time'] <=
-                num_rounds)
-
-
-def test_pushy_passenger_moving_algorithm() -> None:
-    """Test the Pushy Passenger algorithm test with sample_arrivals.csv.
-
-    Note that the configuration is quite a bit more restricted than even
-    the sample one given in the starter code. This should make it easier
-    to trace out the algorithms by hand.
-    """
-    config = {
-        'num_floors': 5,
-        'num_elevators': 2,
-        'elevator_capacity': 1,
-        # This is likely not used.
-        'num_people_per_round': 2,
-        'arrival_generator': FileArrivals(5, 'sample_arrivals.csv'),
-        'moving_algorithm': PushyPassenger(),
-        'visualize': False
-    }
-
-    sim = Simulation(config)
-    results = sim.run(10)
-
-    assert results['num_iterations'] == 10
-    assert results['total_people'] == 4
-
-    # Note: 3 of the 4 people completed their rides.
-    # One sad person arrives at round 1 on floor 5, and never reaches their
-    # target floor. :(
-    assert results['people_completed'] == 3
-    assert results['max_time'] == 3
-    assert results['min_time'] == 3
-    assert results['avg_time'] == 3
-
-
-def test_short_sighted_moving_algorithm() -> None:
-    """Test the Short-Sighted algorithm test with sample_arrivals.csv.
-
-    Note that the configuration is quite a bit more restricted than even
-    the sample one given in the starter code. This should make it easier
-    to trace out the algorithms by hand.
-    """
-    config = {
-        'num_floors': 5,
-        'num_elevators': 2,
-        'elevator_capacity': 1,
-        # This is likely not used.
-        'num_people_per_round': 2,
-        'arrival_generator': FileArrivals(5, 'sample_arrivals.csv'),
-        'moving_algorithm': ShortSighted(),
-        'visualize': False
-    }
-    sim = Simulation(config)
-    results = sim.run(10)
-
-    assert results['num_iterations'] == 10
-    assert results['total_people'] == 4
-
-    # Again, three people manage to complete their rides.
-    # However, these people are different.
-    assert results['people_completed'] == 3
-    assert results['max_time'] == 6
-    assert results['min_time'] == 3
-    assert results['avg_time'] == 4
-
-
-if __name__ == '__main__':
-    import pytest
-    pytest.main(['a1_sample_test.py'])
+"""CSC148 Assignment 1: Sample tests
+
+=== CSC148 Fall 2018 ===
+Department of Computer Science,
+University of Toronto
+
+=== Module description ===
+This module contains sample tests for Assignment 1.
+
+Warning: This is an extremely incomplete set of tests!
+Add your own to practice writing tests and to be confident your code is correct.
+
+For more information on hypothesis (one of the testing libraries we're using),
+please see
+<https://www.teach.cs.toronto.edu/~csc148h/fall/software/hypothesis.html>.
+
+Note: this file is for support purposes only, and is not part of your
+submission.
+"""
+import json
+import os
+import random
+import subprocess
+import sys
+
+import pytest
+
+from algorithms import PushyPassenger, RandomAlgorithm, ShortSighted, RandomArrivals, FileArrivals
+from algorithms import Direction, LookAlgorithm
+import benchmarks
+from benchmarks import compare, run_suite
+from binary_trace import BinaryFileArrivals, convert_csv
+from entities import Clock, Person, Elevator
+from event_log import read_event_log
+from instrumentation import RunProfile
+from occupancy import WaitingQueues
+from replay import Replay
+from replication import run_replication, run_replications, summarize
+from simulation import Simulation
+from sweep import build_config, run_sweep
+from trip_statistics import TripStatistics
+
+
+def test_random_arrival_generator_zero() -> None:
+    """Test the random arrival generator for two rounds: 0 and 5.
+
+    Note that this test just checks that the range of possible values
+    for the random people are correct.
+    """
+    max_floor = 5
+    num_per_round = 2
+    random_generator = RandomArrivals(max_floor, num_per_round)
+
+    for round_num in [0, 5]:
+        arrivals = random_generator.generate(round_num)
+        all_people = []
+        for floor, people in arrivals.items():
+            # Check that the floor is in the correct range.
+            assert 1 <= floor <= max_floor
+
+            all_people.extend(people)
+
+        # Check that the right number of people were generated.
+        assert len(all_people) == num_per_round
+
+        for p in all_people:
+            # Check floor boundaries
+            assert 1 <= p.start <= max_floor
+            assert 1 <= p.target <= max_floor
+
+            # Check that the start and target floors are different.
+            assert p.start != p.target
+
+
+def test_file_arrival_generator() -> None:
+    """Test the CSV arrival generator for the given sample_arrivals file.
+    """
+    max_floor = 5
+    file_generator = FileArrivals(max_floor, 'sample_arrivals.csv')
+
+    # First try round 0. Note that round numbering starts at 0,
+    # but there are no arrivals at round 0 according to the sample file.
+    round_zero = file_generator.generate(0)
+    for _, people in round_zero.items():
+        assert people == []
+
+    # Next try round 1. Two people arrive.
+    round_one = file_generator.generate(1)
+    for floor, people in round_one.items():
+        if floor == 1:
+            assert len(people) == 1
+            assert people[0].start == 1
+            assert people[0].target == 4
+        elif floor == 5:
+            assert len(people) == 1
+            assert people[0].start == 5
+            assert people[0].target == 3
+        else:
+            assert len(people) == 0
+
+    # Next try round 5. One person arrives.
+    round_five = file_generator.generate(5)
+    for floor, people in round_five.items():
+        if floor == 4:
+            assert len(people) == 1
+            assert people[0].start == 4
+            assert people[0].target == 2
+        else:
+            assert len(people) == 0
+
+
+def test_random_moving_algorithm() -> None:
+    """Test the random moving algorithm.
+
+    Note that while we can't exactly calculate every statistic, we can determine
+    whether the statistics have values that are in the right range.
+
+    (And that your simulation runs without crashing.)
+    """
+    config = {
+        'num_floors': 5,
+        'num_elevators': 2,
+        'elevator_capacity': 1,
+        # This is likely not used.
+        'num_people_per_round': 2,
+        'arrival_generator': FileArrivals(5, 'sample_arrivals.csv'),
+        'moving_algorithm': RandomAlgorithm(),
+        # Note that we aren't visualizing anything here.
+        # Your code should still work properly (and run a lot faster) with this
+        # set to False.
+        'visualize': False
+    }
+    sim = Simulation(config)
+    num_rounds = 10
+    results = sim.run(num_rounds)
+
+    # We can check these statistics exactly.
+    assert results['num_iterations'] == num_rounds
+    assert results['total_people'] == 4
+
+    # We can check ranges for this one.
+    assert 0 <= results['people_completed'] <= results['total_people']
+
+    # We can split up the remaining ones.
+    if results['people_completed'] == 0:
+        # If no person reached their target floor, report -1 (exact value).
+        assert results['max_time'] == -1
+        assert results['min_time'] == -1
+        assert results['avg_time'] == -1
+    else:
+        # Check ranges.
+        # Note that the minimum number of rounds it should take for someone to
+        # reach their target floor is *1*---it's impossible for someone to
+        # arrive and reach their target floor in the same round.
+        assert (1 <=
+                results['min_time'] <=
+                results['avg_time'] <=
+                results['max_time'] <=
+                num_rounds)
+
+
+def test_pushy_passenger_moving_algorithm() -> None:
+    """Test the Pushy Passenger algorithm test with sample_arrivals.csv.
+
+    Note that the configuration is quite a bit more restricted than even
+    the sample one given in the starter code. This should make it easier
+    to trace out the algorithms by hand.
+    """
+    config = {
+        'num_floors': 5,
+        'num_elevators': 2,
+        'elevator_capacity': 1,
+        # This is likely not used.
+        'num_people_per_round': 2,
+        'arrival_generator': FileArrivals(5, 'sample_arrivals.csv'),
+        'moving_algorithm': PushyPassenger(),
+        'visualize': False
+    }
+
+    sim = Simulation(config)
+    results = sim.run(10)
+
+    assert results['num_iterations'] == 10
+    assert results['total_people'] == 4
+
+    # Note: 3 of the 4 people completed their rides.
+    # One sad person arrives at round 1 on floor 5, and never reaches their
+    # target floor. :(
+    assert results['people_completed'] == 3
+    assert results['max_time'] == 3
+    assert results['min_time'] == 3
+    assert results['avg_time'] == 3
+
+
+def test_short_sighted_moving_algorithm() -> None:
+    """Test the Short-Sighted algorithm test with sample_arrivals.csv.
+
+    Note that the configuration is quite a bit more restricted than even
+    the sample one given in the starter code. This should make it easier
+    to trace out the algorithms by hand.
+    """
+    config = {
+        'num_floors': 5,
+        'num_elevators': 2,
+        'elevator_capacity': 1,
+        # This is likely not used.
+        'num_people_per_round': 2,
+        'arrival_generator': FileArrivals(5, 'sample_arrivals.csv'),
+        'moving_algorithm': ShortSighted(),
+        'visualize': False
+    }
+    sim = Simulation(config)
+    results = sim.run(10)
+
+    assert results['num_iterations'] == 10
+    assert results['total_people'] == 4
+
+    # Again, three people manage to complete their rides.
+    # However, these people are different.
+    assert results['people_completed'] == 3
+    assert results['max_time'] == 6
+    assert results['min_time'] == 3
+    assert results['avg_time'] == 4
+
+
+def test_headless_simulation_uses_plain_entities() -> None:
+    """Test that a simulation that isn't visualized never creates sprites."""
+    config = {
+        'num_floors': 5,
+        'num_elevators': 2,
+        'elevator_capacity': 1,
+        'num_people_per_round': 2,
+        'arrival_generator': RandomArrivals(5, 2),
+        'moving_algorithm': ShortSighted(),
+        'visualize': False
+    }
+    sim = Simulation(config)
+    sim.run(3)
+
+    assert all(type(elevator) is Elevator for elevator in sim.elevators)
+    for people in sim.waiting.values():
+        assert all(type(person) is Person for person in people)
+
+
+def test_person_sprite_images_are_shared() -> None:
+    """Test that person sprites share cached images, and only swap them
+    when their anger level changes.
+    """
+    pytest.importorskip('pygame')
+    from visual_entities import VisualPerson
+
+    first = VisualPerson(1, 2)
+    second = VisualPerson(3, 4)
+    assert first.image is second.image
+
+    calm_image = first.image
+    first.increase_wait_time()
+    first.refresh_image()
+    assert first.image is calm_image
+
+    for _ in range(2):
+        first.increase_wait_time()
+    first.refresh_image()
+    assert first.get_anger_level() == 1
+    assert first.image is not calm_image
+
+
+def test_elevator_disembarks_by_target_floor() -> None:
+    """Test that passengers leave an elevator by target floor, and that the
+    boarding order of the rest is kept in the elevator's passengers list.
+    """
+    elevator = Elevator(4)
+    passengers = elevator.passengers
+    first, second, third = Person(1, 3), Person(1, 5), Person(1, 3)
+    for person in [first, second, third]:
+        elevator.add_passenger(person)
+    assert passengers == [first, second, third]
+
+    assert elevator.remove_passengers_to(4) == []
+    assert elevator.remove_passengers_to(3) == [first, third]
+    assert elevator.passengers is passengers
+    assert elevator.get_passengers() == [second]
+    assert elevator.first_passenger() is second
+    assert elevator.free_capacity() == 3
+
+
+def test_wait_time_follows_clock() -> None:
+    """Test that a person's wait time is measured against the clock of the
+    simulation they arrived in, and stops once they reach their target.
+    """
+    clock = Clock()
+    person = Person(1, 3)
+    person.increase_wait_time()
+    person.arrive(clock)
+    assert person.get_wait_time() == 1
+
+    for _ in range(8):
+        clock.tick()
+    assert person.get_wait_time() == 9
+    assert person.get_anger_level() == 4
+
+    person.finish()
+    clock.tick()
+    assert person.get_wait_time() == 9
+
+
+def test_trip_statistics_percentiles() -> None:
+    """Test the streaming trip statistics against exact values."""
+    stats = TripStatistics()
+    assert stats.percentile(50) == -1
+    assert stats.mean() == -1
+
+    for trip_time in range(1, 101):
+        stats.record(trip_time)
+    assert (stats.count, stats.min_time, stats.max_time) == (100, 1, 100)
+    assert stats.mean() == 50
+    assert stats.percentile(50) == 50
+    assert stats.percentile(90) == 90
+    assert stats.percentile(99) == 99
+
+    stats.record(10 ** 6)
+    assert stats.percentile(100) == 10 ** 6
+
+
+def test_replications_are_reproducible() -> None:
+    """Test that replications with the same seed give the same results, and
+    that summaries cover every statistic.
+    """
+    config = {
+        'num_floors': 6,
+        'num_elevators': 2,
+        'elevator_capacity': 3,
+        'num_people_per_round': 2,
+        'arrival_generator': RandomArrivals(6, 2),
+        'moving_algorithm': RandomAlgorithm(),
+        'visualize': False
+    }
+    first = run_replications(config, 20, [1, 2, 3], processes=1)
+    second = run_replications(config, 20, [3, 2, 1], processes=1)
+    assert first == second[::-1]
+
+    summary = summarize(first)
+    assert summary['total_people']['mean'] == 40
+    assert summary['total_people']['ci_low'] == 40
+    assert (summary['avg_time']['ci_low'] <= summary['avg_time']['mean'] <=
+            summary['avg_time']['ci_high'])
+
+
+def test_sweep_reuses_cached_results(tmp_path) -> None:
+    """Test that a sweep only runs the cells that aren't already cached."""
+    grid = {
+        'num_floors': [5],
+        'num_elevators': [2],
+        'elevator_capacity': [2],
+        'num_people_per_round': [1],
+        'moving_algorithm': ['PushyPassenger']
+    }
+    first = run_sweep(grid, 10, [0], str(tmp_path), processes=1)
+    assert len(list(tmp_path.rglob('*.json'))) == 1
+
+    grid['moving_algorithm'].append('ShortSighted')
+    second = run_sweep(grid, 10, [0], str(tmp_path), processes=1)
+    assert len(list(tmp_path.rglob('*.json'))) == 2
+    assert second[0] == first[0]
+    assert second[1]['moving_algorithm'] == 'ShortSighted'
+
+
+def test_sweep_runs_algorithms_from_other_modules(tmp_path) -> None:
+    """Test that a sweep can run a moving algorithm outside algorithms.py,
+    named by its module and class, and gives the same results as running it
+    directly.
+    """
+    dispatch = pytest.importorskip('dispatch')
+    grid = {
+        'num_floors': [8],
+        'num_elevators': [3],
+        'elevator_capacity': [2],
+        'num_people_per_round': [2],
+        'moving_algorithm': ['LookAlgorithm', 'dispatch.EtaDispatcher']
+    }
+    rows = run_sweep(grid, 20, [0], str(tmp_path), processes=1)
+    assert [row['moving_algorithm'] for row in rows] == \
+        ['LookAlgorithm', 'dispatch.EtaDispatcher']
+    assert len(list(tmp_path.rglob('*.json'))) == 2
+
+    config = build_config({key: values[0] for key, values in grid.items()})
+    config['moving_algorithm'] = dispatch.EtaDispatcher()
+    direct = run_replication(config, 20, 0)
+    assert {key: rows[1][key] for key in direct} == direct
+    # Cached results are reused.
+    assert run_sweep(grid, 20, [0], str(tmp_path), processes=1) == rows
+
+
+def test_sweep_keeps_cache_when_an_algorithm_is_added(tmp_path) -> None:
+    """Test that adding a new algorithm to algorithms.py leaves the cached
+    results of the other algorithms valid, by sweeping a copy of the code
+    before and after adding one.
+    """
+    code = tmp_path / 'code'
+    code.mkdir()
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for filename in os.listdir(directory):
+        if filename.endswith('.py'):
+            with open(os.path.join(directory, filename), 'rb') as source:
+                (code / filename).write_bytes(source.read())
+    cache = tmp_path / 'cache'
+
+    def sweep(algorithm_names: list) -> None:
+        subprocess.run([sys.executable, 'sweep.py', '--rounds', '5',
+                        '--processes', '1', '--cache-dir', str(cache),
+                        '--output', str(tmp_path / 'rows.csv'),
+                        '--algorithms'] + algorithm_names,
+                       cwd=str(code), check=True)
+
+    sweep(['PushyPassenger'])
+    assert len(list(cache.rglob('*.json'))) == 1
+    with open(code / 'algorithms.py', 'a') as source:
+        source.write('\n\nclass StayPut(MovingAlgorithm):\n'
+                     '    def move_elevators(self, elevators, waiting, '
+                     'max_floor):\n'
+                     '        return [Direction.STAY for _ in elevators]\n')
+    sweep(['PushyPassenger', 'StayPut'])
+    # Only the new algorithm's cell was added.
+    assert len(list(cache.rglob('*.json'))) == 2
+
+
+def test_file_arrivals_streaming(tmp_path) -> None:
+    """Test that streaming arrivals merge repeated rounds, and give the same
+    arrivals as reading the whole file.
+    """
+    trace = tmp_path / 'trace.csv'
+    trace.write_text('0, 1, 2\n2, 3, 1\n1, 2, 3\n2, 1, 3, 2, 1\n\n4, 3, 2\n')
+    eager = FileArrivals(3, str(trace))
+    streaming = FileArrivals(3, str(trace), streaming=True, read_ahead=2)
+    assert streaming.csv == {}
+
+    for round_num in range(6):
+        expected = eager.generate(round_num)
+        actual = streaming.generate(round_num)
+        assert ({floor: [(p.start, p.target) for p in people]
+                 for floor, people in expected.items()} ==
+                {floor: [(p.start, p.target) for p in people]
+                 for floor, people in actual.items()})
+    streaming.close()
+
+    round_two = eager.generate(2)
+    assert [(p.start, p.target) for p in round_two[1]] == [(1, 3)]
+    assert [(p.start, p.target) for p in round_two[3]] == [(3, 1)]
+
+    # A closed stream re-opens where it left off, and a simulation closes
+    # its generator when it finishes, even before reading to the end.
+    with FileArrivals(3, str(trace), streaming=True, read_ahead=1) as closed:
+        assert closed.next_arrival_round(0) == 0
+    assert closed._file is None
+    assert sum(len(people) for people in closed.generate(2).values()) == 3
+    closed.close()
+    config = {
+        'num_floors': 3,
+        'num_elevators': 1,
+        'elevator_capacity': 1,
+        'num_people_per_round': 0,
+        'arrival_generator': FileArrivals(3, str(trace), streaming=True,
+                                          read_ahead=2),
+        'moving_algorithm': PushyPassenger(),
+        'visualize': False
+    }
+    sim = Simulation(config)
+    assert sim.run(2)['total_people'] == 2
+    assert sim.arrival_generator._file is None
+
+
+def test_binary_trace_matches_file_arrivals(tmp_path) -> None:
+    """Test that a converted binary trace replays the same arrivals as the
+    CSV trace it was converted from, in sorted and unsorted order.
+    """
+    for text in ['0, 1, 2\n1, 2, 3, 3, 1\n1, 1, 3\n4, 3, 2\n',
+                 '4, 3, 2\n1, 2, 3\n0, 1, 2\n1, 3, 1, 1, 3\n']:
+        csv_path = tmp_path / 'trace.csv'
+        bin_path = tmp_path / 'trace.bin'
+        csv_path.write_text(text)
+        assert convert_csv(str(csv_path), str(bin_path)) == 5
+        expected = FileArrivals(3, str(csv_path))
+        actual = BinaryFileArrivals(3, str(bin_path))
+        for round_num in range(7):
+            assert ({floor: [(p.start, p.target) for p in people]
+                     for floor, people in expected.generate(round_num).items()}
+                    == {floor: [(p.start, p.target) for p in people]
+                        for floor, people in actual.generate(round_num).items()})
+        actual.close()
+
+    # A closed trace is mapped again when read, and a simulation closes it
+    # when it finishes running.
+    with BinaryFileArrivals(3, str(bin_path)) as closed:
+        assert closed.next_arrival_round(2) == 4
+    assert closed._file is None and closed._map is None
+    assert len(closed.round_records(1)) == 3 * 3
+    closed.close()
+    closed.close()
+    config = {
+        'num_floors': 3,
+        'num_elevators': 1,
+        'elevator_capacity': 2,
+        'num_people_per_round': None,
+        'arrival_generator': BinaryFileArrivals(3, str(bin_path)),
+        'moving_algorithm': ShortSighted(),
+        'visualize': False
+    }
+    sim = Simulation(config)
+    assert sim.run(6)['total_people'] == 5
+    assert sim.arrival_generator._file is None
+
+
+def test_batched_random_arrivals() -> None:
+    """Test that batched random arrivals are reproducible, never target their
+    starting floor, and don't depend on the random module.
+    """
+    traffic = pytest.importorskip('traffic')
+    first = traffic.BatchedRandomArrivals(5, 40, seed=3, block_rounds=4)
+    second = traffic.BatchedRandomArrivals(5, 40, seed=3, block_rounds=4)
+    for round_num in range(10):
+        arrivals = first.generate(round_num)
+        assert sum(len(people) for people in arrivals.values()) == 40
+        assert all(person.start == floor != person.target
+                   for floor, people in arrivals.items() for person in people)
+        assert ({floor: [p.target for p in people]
+                 for floor, people in arrivals.items()} ==
+                {floor: [p.target for p in people]
+                 for floor, people in second.generate(round_num).items()})
+
+    results = []
+    for random_seed in [1, 2]:
+        random.seed(random_seed)
+        config = {
+            'num_floors': 5,
+            'num_elevators': 2,
+            'elevator_capacity': 3,
+            'num_people_per_round': 4,
+            'arrival_generator': traffic.BatchedRandomArrivals(5, 4, seed=7),
+            'moving_algorithm': ShortSighted(),
+            'visualize': False
+        }
+        results.append(Simulation(config).run(30))
+    assert results[0] == results[1]
+
+
+def test_poisson_arrivals_follow_profile() -> None:
+    """Test that Poisson arrivals are reproducible, follow each period's
+    origin-destination matrix, and arrive at about the period's rate.
+    """
+    traffic = pytest.importorskip('traffic')
+    periods = traffic.business_day(10, 600, rounds_per_hour=100)
+    first = traffic.PoissonArrivals(10, periods, seed=5)
+    second = traffic.PoissonArrivals(10, periods, seed=5)
+    assert first.day_length == 1000
+
+    counts = []
+    for round_num in range(first.day_length):
+        arrivals = first.generate(round_num)
+        expected = second.generate(round_num)
+        pairs = [(p.start, p.target) for people in arrivals.values()
+                 for p in people]
+        assert pairs == [(p.start, p.target) for people in expected.values()
+                         for p in people]
+        assert all(start != target for start, target in pairs)
+        if round_num < 100:
+            # The morning up-peak averages 6 people per round.
+            counts.append(len(pairs))
+    assert 500 <= sum(counts) <= 700
+
+    up_peak = traffic.PoissonArrivals(10, [traffic.TrafficPeriod(
+        10, 5.0, [[0] + [1] * 9] + [[0] * 10] * 9)], seed=1)
+    for round_num in range(30):
+        assert set(up_peak.generate(round_num)) <= {1}
+
+
+def test_poisson_arrivals_skip_quiet_periods() -> None:
+    """Test that Poisson arrivals report when the next period with arrivals
+    starts, so that idle rounds through quiet periods are skipped without
+    changing the results.
+    """
+    traffic = pytest.importorskip('traffic')
+    demand = [[0, 1, 1], [1, 0, 1], [1, 1, 0]]
+    periods = [traffic.TrafficPeriod(50, 0.0, demand),
+               traffic.TrafficPeriod(5, 1.0, demand),
+               traffic.TrafficPeriod(45, 0.0, demand)]
+    arrivals = traffic.PoissonArrivals(3, periods, seed=2)
+    assert arrivals.next_arrival_round(0) == 50
+    assert arrivals.next_arrival_round(52) == 52
+    assert arrivals.next_arrival_round(55) == 150
+    assert arrivals.next_arrival_round(260) == 350
+    quiet = traffic.PoissonArrivals(3, [periods[0]], seed=2)
+    assert quiet.next_arrival_round(0) is None
+
+    results = []
+    for skip_idle in [False, True]:
+        generator = traffic.PoissonArrivals(3, periods, seed=4)
+        calls = []
+        original_generate = generator.generate
+        generator.generate = lambda round_num: \
+            calls.append(round_num) or original_generate(round_num)
+        config = {
+            'num_floors': 3,
+            'num_elevators': 1,
+            'elevator_capacity': 2,
+            'num_people_per_round': None,
+            'arrival_generator': generator,
+            'moving_algorithm': LookAlgorithm(),
+            'visualize': False,
+            'skip_idle': skip_idle
+        }
+        results.append(Simulation(config).run(300))
+        if skip_idle:
+            assert 1 not in calls and 50 in calls and len(calls) < 100
+    assert results[0] == results[1]
+    assert results[1]['total_people'] > 0
+
+
+def test_short_sighted_uses_waiting_index() -> None:
+    """Test that ShortSighted breaks ties towards the lower floor, whether
+    it is given a WaitingQueues or a plain dictionary.
+    """
+    waiting = WaitingQueues(7)
+    waiting.add_arrivals(2, [Person(2, 5)])
+    waiting.add_arrivals(6, [Person(6, 1)])
+    assert list(waiting.occupied) == [2, 6]
+    elevators = [Elevator(2), Elevator(2), Elevator(2)]
+    elevators[0].current_floor = 4
+    elevators[1].current_floor = 5
+    elevators[2].current_floor = 4
+    elevators[2].add_passenger(Person(1, 7))
+    elevators[2].add_passenger(Person(1, 1))
+    expected = [Direction.DOWN, Direction.UP, Direction.DOWN]
+    assert ShortSighted().move_elevators(elevators, waiting, 7) == expected
+    plain = {floor: list(people) for floor, people in waiting.items()}
+    assert ShortSighted().move_elevators(elevators, plain, 7) == expected
+
+    waiting.board(2)
+    assert list(waiting.occupied) == [6]
+    assert ShortSighted().move_elevators(elevators, waiting, 7)[0] == \
+        Direction.UP
+
+    # The starter code's helpers are still available.
+    assert ShortSighted().floor_check(elevators[1], 7) == [5, 4, 6, 3, 7, 2, 1]
+    assert ShortSighted().filter_impossible_floors([0, 3, 8], 7) == [3]
+
+
+def test_boarding_fills_open_elevators_in_order() -> None:
+    """Test that people board the open elevators on their floor in the order
+    they arrived, filling the lowest-numbered elevator first, and that no
+    elevator takes more people than it has room for.
+    """
+    config = {
+        'num_floors': 5,
+        'num_elevators': 4,
+        'elevator_capacity': 2,
+        'num_people_per_round': 0,
+        'arrival_generator': FileArrivals(5, 'sample_arrivals.csv'),
+        'moving_algorithm': PushyPassenger(),
+        'visualize': False
+    }
+    sim = Simulation(config)
+    for elevator, floor in zip(sim.elevators, [3, 1, 3, 3]):
+        elevator.current_floor = floor
+    sim.elevators[0].add_passenger(Person(1, 5))
+    sim.elevators[3].add_passenger(Person(1, 5))
+    sim.elevators[3].add_passenger(Person(1, 4))
+    people = [Person(3, 1) for _ in range(5)]
+    sim.waiting.add_arrivals(3, people)
+
+    sim._handle_boarding()
+    assert sim.elevators[0].get_passengers()[1:] == people[:1]
+    assert sim.elevators[1].is_empty()
+    assert sim.elevators[2].get_passengers() == people[1:3]
+    assert sim.elevators[3].num_passengers() == 2
+    assert list(sim.waiting[3]) == people[3:]
+
+
+def test_simulation_tracks_waiting_floors() -> None:
+    """Test that the simulation's waiting index follows arrivals and
+    boarding, and that PushyPassenger heads for the lowest waiting floor.
+    """
+    config = {
+        'num_floors': 6,
+        'num_elevators': 1,
+        'elevator_capacity': 1,
+        'num_people_per_round': 0,
+        'arrival_generator': FileArrivals(6, 'sample_arrivals.csv'),
+        'moving_algorithm': PushyPassenger(),
+        'visualize': False
+    }
+    sim = Simulation(config)
+    assert sim.moving_algorithm.check_waiting(sim.waiting)
+    sim.waiting.add_arrivals(5, [Person(5, 1), Person(5, 2)])
+    sim.waiting.add_arrivals(3, [Person(3, 4)])
+    assert list(sim.waiting.occupied) == [3, 5]
+    assert not sim.moving_algorithm.check_waiting(sim.waiting)
+    assert sim.moving_algorithm.get_lowest_floor(sim.waiting) == 3
+
+    sim.elevators[0].current_floor = 3
+    sim._handle_boarding()
+    assert list(sim.waiting.occupied) == [5]
+    assert sim.moving_algorithm.get_lowest_floor(sim.waiting) == 5
+
+
+def test_look_algorithm_keeps_direction() -> None:
+    """Test that LOOK keeps travelling towards calls ahead of it before
+    turning around for closer calls behind it.
+    """
+    algorithm = LookAlgorithm()
+    waiting = WaitingQueues(8)
+    elevator = Elevator(3)
+    elevator.current_floor = 4
+    elevator.add_passenger(Person(1, 7))
+    waiting.add_arrivals(6, [Person(6, 1)])
+    assert algorithm.move_elevators([elevator], waiting, 8) == [Direction.UP]
+
+    elevator.current_floor = 5
+    waiting.add_arrivals(4, [Person(4, 8)])
+    assert algorithm.move_elevators([elevator], waiting, 8) == [Direction.UP]
+
+    elevator.current_floor = 7
+    elevator.remove_passengers_to(7)
+    # Nothing lies above any more, so the elevator turns around.
+    assert algorithm.move_elevators([elevator], waiting, 8) == \
+        [Direction.DOWN]
+
+    waiting.board(6)
+    waiting.board(4)
+    assert algorithm.move_elevators([elevator], waiting, 8) == \
+        [Direction.STAY]
+
+
+def test_eta_dispatcher_sends_one_elevator() -> None:
+    """Test that the ETA dispatcher sends only the closest idle elevator to
+    a hall call, and sends another one when a second call appears.
+    """
+    dispatch = pytest.importorskip('dispatch')
+    algorithm = dispatch.EtaDispatcher()
+    elevators = [Elevator(2) for _ in range(3)]
+    elevators[2].current_floor = 8
+    waiting = WaitingQueues(10)
+    waiting.add_arrivals(4, [Person(4, 1)])
+    assert algorithm.move_elevators(elevators, waiting, 10) == \
+        [Direction.UP, Direction.STAY, Direction.STAY]
+
+    waiting.add_arrivals(9, [Person(9, 1)])
+    elevators[0].current_floor = 2
+    assert algorithm.move_elevators(elevators, waiting, 10) == \
+        [Direction.UP, Direction.STAY, Direction.UP]
+
+
+def test_skip_idle_matches_every_round(tmp_path) -> None:
+    """Test that skipping idle rounds gives exactly the same statistics as
+    simulating every round, and skips the generator calls in between.
+    """
+    trace = tmp_path / 'sparse.csv'
+    trace.write_text('0, 1, 4\n3, 5, 2, 2, 6\n400, 6, 1\n1000, 3, 4\n')
+    results = []
+    for skip_idle in [False, True]:
+        generator = FileArrivals(6, str(trace))
+        calls = []
+        original_generate = generator.generate
+        generator.generate = lambda round_num: \
+            calls.append(round_num) or original_generate(round_num)
+        config = {
+            'num_floors': 6,
+            'num_elevators': 2,
+            'elevator_capacity': 2,
+            'num_people_per_round': 0,
+            'arrival_generator': generator,
+            'moving_algorithm': LookAlgorithm(),
+            'visualize': False,
+            'skip_idle': skip_idle
+        }
+        results.append(Simulation(config).run(1500))
+        if skip_idle:
+            assert 400 in calls and 1000 in calls and len(calls) < 100
+        else:
+            assert len(calls) == 1500
+    assert results[0] == results[1]
+    assert results[1]['num_iterations'] == 1500
+    assert results[1]['people_completed'] == 5
+
+
+def test_checkpoint_resume_is_identical(tmp_path) -> None:
+    """Test that a simulation resumed from a checkpoint, including one
+    written periodically in the background, finishes exactly as an
+    uninterrupted run does.
+    """
+    def make_config() -> dict:
+        return {
+            'num_floors': 8,
+            'num_elevators': 3,
+            'elevator_capacity': 2,
+            'num_people_per_round': 3,
+            'arrival_generator': RandomArrivals(8, 3),
+            'moving_algorithm': RandomAlgorithm(),
+            'visualize': False
+        }
+
+    random.seed(11)
+    expected = Simulation(make_config()).run(60)
+
+    random.seed(11)
+    sim = Simulation(make_config())
+    sim.run(25)
+    sim.save_checkpoint(str(tmp_path / 'manual.ckpt'))
+    random.seed(0)
+    resumed = Simulation.load_checkpoint(str(tmp_path / 'manual.ckpt'))
+    assert resumed.resume(60) == expected
+
+    random.seed(11)
+    config = make_config()
+    config['checkpoint_path'] = str(tmp_path / 'periodic.ckpt')
+    config['checkpoint_every'] = 10
+    Simulation(config).run(35)
+    random.seed(0)
+    resumed = Simulation.load_checkpoint(str(tmp_path / 'periodic.ckpt'))
+    assert resumed.resume(60) == expected
+
+
+def test_profile_counts_stages() -> None:
+    """Test that a profiled run reports stage times and counters next to
+    unchanged statistics, and an unprofiled run reports no profile.
+    """
+    def make_config(profile: bool) -> dict:
+        return {
+            'num_floors': 6,
+            'num_elevators': 2,
+            'elevator_capacity': 3,
+            'num_people_per_round': 2,
+            'arrival_generator': RandomArrivals(6, 2),
+            'moving_algorithm': ShortSighted(),
+            'visualize': False,
+            'profile': profile
+        }
+
+    random.seed(5)
+    plain = Simulation(make_config(False)).run(40)
+    assert 'profile' not in plain
+
+    random.seed(5)
+    stats = Simulation(make_config(True)).run(40)
+    profile = stats.pop('profile')
+    assert stats == plain
+
+    counters = profile['counters']
+    assert counters['arrivals'] == plain['total_people'] == 80
+    assert counters['disembarks'] == plain['people_completed']
+    assert counters['disembarks'] <= counters['boardings'] <= 80
+    assert counters['algorithm_calls'] == 40
+    assert 0 < counters['moves'] <= 80
+    for stage in ['arrivals', 'leaving', 'boarding', 'moving', 'wait']:
+        assert profile['stages'][stage]['calls'] == 40
+        assert profile['stages'][stage]['total'] >= 0
+        times = profile['stages'][stage]['per_round']
+        assert len(times) == 40
+        assert max(times) == profile['stages'][stage]['max']
+    assert profile['stages']['visualizer.show_arrivals']['calls'] == 40
+
+    # Only the most recent times are kept, but the summary covers every run.
+    capped = RunProfile(max_rounds=3)
+    for seconds in [5.0, 1.0, 2.0, 3.0]:
+        capped.add_time('stage', seconds)
+    report = capped.report()['stages']['stage']
+    assert report['per_round'] == [1.0, 2.0, 3.0]
+    assert (report['calls'], report['max'], report['total']) == (4, 5.0, 11.0)
+
+    # Summaries of profiled replications skip the profile.
+    summary = summarize([Simulation(make_config(True)).run(5)
+                         for _ in range(2)])
+    assert 'profile' not in summary
+    assert summary['total_people']['mean'] == 10
+
+
+def test_benchmarks_flag_regressions(monkeypatch, capsys, tmp_path) -> None:
+    """Test that the benchmark suite times runs and microbenchmarks, that
+    compare only flags benchmarks that got slower than the threshold, and
+    that results written to standard output stay parseable when compared.
+    """
+    grid = {
+        'num_floors': [6],
+        'num_elevators': [2],
+        'elevator_capacity': [3],
+        'num_people_per_round': [2],
+        'moving_algorithm': ['PushyPassenger']
+    }
+    suite = run_suite(grid, num_rounds=5, repeat=1, number=2)
+    names = list(suite['results'])
+    assert names[0] == 'run/PushyPassenger/floors=6/elevators=2/' \
+                       'capacity=3/people=2'
+    assert 'micro/Simulation._handle_boarding' in names
+    assert 'micro/FileArrivals.__init__' in names
+    for result in suite['results'].values():
+        assert result['best'] == min(result['times']) >= 0
+
+    baseline = {'results': {'a': {'best': 1.0}, 'b': {'best': 1.0},
+                            'c': {'best': 1.0}}}
+    current = {'results': {'a': {'best': 1.05}, 'b': {'best': 1.5},
+                           'd': {'best': 9.0}}}
+    rows = compare(baseline, current, threshold=0.1)
+    assert [(row['name'], row['regressed']) for row in rows] == \
+        [('a', False), ('b', True)]
+
+    path = tmp_path / 'baseline.json'
+    path.write_text(json.dumps(baseline))
+    monkeypatch.setattr(benchmarks, 'run_suite', lambda *args: current)
+    assert benchmarks.main(['run', '--compare', str(path)]) == 1
+    out, err = capsys.readouterr()
+    assert json.loads(out) == current
+    assert 'REGRESSED' in err
+
+
+def test_headless_simulation_runs_without_pygame() -> None:
+    """Test that headless simulations never import Pygame, by running one in
+    a fresh interpreter where importing Pygame fails.
+    """
+    script = """
+import sys
+sys.modules['pygame'] = None
+from algorithms import RandomArrivals, ShortSighted
+from simulation import Simulation
+config = {
+    'num_floors': 5,
+    'num_elevators': 2,
+    'elevator_capacity': 2,
+    'num_people_per_round': 2,
+    'arrival_generator': RandomArrivals(5, 2),
+    'moving_algorithm': ShortSighted(),
+    'visualize': False
+}
+print(Simulation(config).run(10)['total_people'])
+"""
+    directory = os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run([sys.executable, '-c', script], cwd=directory,
+                            capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == '20'
+
+
+def test_event_log_replay_matches_simulation(tmp_path) -> None:
+    """Test that replaying a simulation's event log, including rounds it
+    skipped as idle, reaches the same states as the simulation, whichever
+    round it seeks to.
+    """
+    path = str(tmp_path / 'events.log')
+
+    def make_config(event_log: bool) -> dict:
+        config = {
+            'num_floors': 7,
+            'num_elevators': 3,
+            'elevator_capacity': 2,
+            'num_people_per_round': None,
+            'arrival_generator': FileArrivals(7, 'sample_arrivals.csv'),
+            'moving_algorithm': ShortSighted(),
+            'visualize': False,
+            'skip_idle': True
+        }
+        if event_log:
+            config['event_log'] = path
+        return config
+
+    def check(replay: Replay, sim: Simulation) -> None:
+        assert replay.round_num == sim._clock.round_num
+        assert replay.num_completed == sim.trip_stats.count
+        for replayed, elevator in zip(replay.elevators, sim.elevators):
+            assert replayed.get_floor() == elevator.get_floor()
+            assert [(p.start, p.target, p.get_wait_time())
+                    for p in replayed.get_passengers()] == \
+                [(p.start, p.target, p.get_wait_time())
+                 for p in elevator.get_passengers()]
+        for floor, queue in sim.waiting.items():
+            assert [p.get_wait_time() for p in replay.waiting[floor]] == \
+                [p.get_wait_time() for p in queue]
+
+    sim = Simulation(make_config(True))
+    sim.run(30)
+    replay = Replay(read_event_log(path), visualize=False)
+    replay.seek(30)
+    check(replay, sim)
+
+    middle = Simulation(make_config(False))
+    middle.run(9)
+    replay.seek(9)
+    check(replay, middle)
+    replay.play(30)
+    check(replay, sim)
+
+
+def test_visualizer_batches_boarding_frames(monkeypatch) -> None:
+    """Test that everyone boarding in a round is animated in the same frames,
+    and that redrawing only the parts of the screen that changed leaves it
+    exactly as a full redraw would.
+    """
+    pygame = pytest.importorskip('pygame')
+    monkeypatch.setenv('SDL_VIDEODRIVER', 'dummy')
+    from visual_entities import VisualElevator, VisualPerson
+    from visualizer import Visualizer
+
+    elevators = [VisualElevator(10), VisualElevator(10)]
+    visualizer = Visualizer(elevators, 4, True, speed=1000)
+    frames = []
+    monkeypatch.setattr(pygame.display, 'update',
+                        lambda rects: frames.append(len(rects)))
+
+    def board(num_people: int) -> int:
+        people = [VisualPerson(1, 3) for _ in range(num_people)]
+        visualizer.show_arrivals({1: people})
+        for i, person in enumerate(people):
+            elevators[i % 2].add_passenger(person)
+        frames.clear()
+        visualizer.show_boardings([(person, elevators[i % 2])
+                                   for i, person in enumerate(people)])
+        return len(frames)
+
+    assert board(1) == board(8)
+    visualizer.show_elevator_moves(elevators, [Direction.UP, Direction.STAY])
+    visualizer.render_header(1)
+
+    expected = visualizer._background.copy()
+    visualizer._sprite_group.draw(expected)
+    visualizer._stats_group.draw(expected)
+    assert pygame.image.tobytes(visualizer._screen, 'RGB') == \
+        pygame.image.tobytes(expected, 'RGB')
+
+    # People who have left are no longer drawn, or looked through each frame.
+    leaving = [(person, elevator) for elevator in elevators
+               for person in elevator.remove_passengers_to(3)]
+    visualizer.show_disembarkings(leaving)
+    assert visualizer._drawn == elevators
+    assert len(visualizer._drawn_rects) == 2
+    expected = visualizer._background.copy()
+    visualizer._sprite_group.draw(expected)
+    visualizer._stats_group.draw(expected)
+    assert pygame.image.tobytes(visualizer._screen, 'RGB') == \
+        pygame.image.tobytes(expected, 'RGB')
+
+
+def test_visualizer_viewport_culls_tall_buildings(monkeypatch) -> None:
+    """Test that a tall building is shown through a viewport of at most
+    MAX_VISIBLE_FLOORS floors, which can be scrolled, and that elevators out
+    of view aren't drawn.
+    """
+    pygame = pytest.importorskip('pygame')
+    monkeypatch.setenv('SDL_VIDEODRIVER', 'dummy')
+    from visual_entities import VisualElevator
+    import visualizer as vis
+
+    elevators = [VisualElevator(10), VisualElevator(10)]
+    visualizer = vis.Visualizer(elevators, 150, True, speed=1000)
+    assert visualizer._screen.get_height() == \
+        vis.STAT_WINDOW_HEIGHT + vis.MAX_VISIBLE_FLOORS * vis.FLOOR_HEIGHT
+
+    visualizer.scroll_to(100)
+    view = visualizer._view
+    assert view.top <= visualizer.get_y_of_floor(100) <= view.bottom
+    assert not view.colliderect(elevators[0].rect)
+
+    frames = []
+    monkeypatch.setattr(pygame.display, 'update',
+                        lambda rects: frames.append(list(rects)))
+    elevators[1].current_floor = 2
+    visualizer.show_elevator_moves(elevators, [Direction.STAY, Direction.UP])
+    assert len(frames) == vis.ANIMATION_FRAMES
+    assert all(len(rects) == 0 for rects in frames[:-1])
+
+    screen = pygame.image.tobytes(visualizer._screen, 'RGB')
+    visualizer.render()
+    assert pygame.image.tobytes(visualizer._screen, 'RGB') == screen
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main(['a1_sample_test.py'])
@@ -17,12 +17,15 @@ See the 'Arrival generation algorithms' and 'Elevator moving algorithms'
 sections of the assignment handout for a complete description of each algorithm
 you are expected to implement in this file.
 """
+import bisect
 import csv
 from enum import Enum
+import heapq
 import random
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, TextIO, Tuple, Type
 
 from entities import Person, Elevator
+import occupancy
 
 
 ###############################################################################
@@ -37,6 +40,9 @@ class ArrivalGenerator:
                beyond this floor.
     num_people: The number of people to generate, or None if this is left
                 up to the algorithm itself.
+    person_type: The class used to create new people. This is Person by
+                 default; the simulation replaces it with a sprite-backed
+                 subclass when it is being visualized.
 
     === Representation Invariants ===
     max_floor >= 2
@@ -44,6 +50,7 @@ class ArrivalGenerator:
     """
     max_floor: int
     num_people: Optional[int]
+    person_type: Type[Person]
 
     def __init__(self, max_floor: int, num_people: Optional[int]) -> None:
         """Initialize a new ArrivalGenerator.
@@ -54,6 +61,7 @@ class ArrivalGenerator:
         """
         self.max_floor = max_floor
         self.num_people = num_people
+        self.person_type = Person
 
     def generate(self, round_num: int) -> Dict[int, List[Person]]:
         """Return the new arrivals for the simulation at the given round.
@@ -65,6 +73,39 @@ class ArrivalGenerator:
         """
         raise NotImplementedError
 
+    def next_arrival_round(self, round_num: int) -> Optional[int]:
+        """Return the first round, from the given round on, in which anyone
+        might arrive, or None if nobody will ever arrive again.
+
+        Simulations use this to skip over rounds in which nothing happens, so
+        generate must not need to be called for the rounds that are skipped.
+        By default every round might have arrivals.
+        """
+        return round_num
+
+    def reseed(self, seed: Optional[int]) -> None:
+        """Restart any random number generator this algorithm owns from the
+        given seed.
+
+        Algorithms that use the random module, or no randomness at all, have
+        nothing to reseed.
+        """
+        pass
+
+    def close(self) -> None:
+        """Release any file this algorithm holds open.
+
+        Simulations call this when they finish running. Algorithms that don't
+        read from a file have nothing to release.
+        """
+        pass
+
+    def __enter__(self) -> 'ArrivalGenerator':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
     def generate_new_arrivals(self,
                               people: List[Person]) -> Dict[int, List[Person]]:
         """Returns a dictionary of new arrivals based on the people generated
@@ -108,6 +149,14 @@ class RandomArrivals(ArrivalGenerator):
         people = self.generate_people()
         return ArrivalGenerator.generate_new_arrivals(self, people)
 
+    def next_arrival_round(self, round_num: int) -> Optional[int]:
+        """Return the first round, from the given round on, in which anyone
+        might arrive, or None if nobody will ever arrive again.
+        """
+        if self.num_people is None or self.num_people == 0:
+            return None
+        return round_num
+
     def generate_people(self) -> List[Person]:
         """
         Return a list of people with randomly generated
@@ -119,23 +168,77 @@ class RandomArrivals(ArrivalGenerator):
 
         for _ in range(self.num_people):
             rand_floors = random.sample(possible_floors, 2)
-            people.append(Person(rand_floors[0], rand_floors[1]))
+            people.append(self.person_type(rand_floors[0], rand_floors[1]))
         return people
 
 
+def parse_arrival_line(line: List[str]) -> List[int]:
+    """Return the integers in one line of an arrivals CSV file: the round
+    number, followed by pairs of starting and target floors.
+
+    Empty and non-numeric fields are skipped, so a blank line gives [].
+    """
+    try:
+        return [int(field) for field in line]
+    except ValueError:
+        pass
+    numbers = []
+    for field in line:
+        if not field.isalpha() and not len(field.strip()) == 0:
+            numbers.append(int(field))
+    return numbers
+
+
 class FileArrivals(ArrivalGenerator):
     """Generate arrivals from a CSV file.
 
+    By default the whole file is read when the generator is created. In
+    streaming mode, the file is instead read incrementally as rounds are
+    generated, holding at most <read_ahead> lines in memory at once, so
+    arbitrarily large traces can be replayed in constant memory.
+
+    A streamed file stays open until it has been read to the end or the
+    generator is closed, either with close or by using the generator in a
+    with statement. Simulations close it when they finish running. A closed
+    generator re-opens the file where it left off if it is used again.
+
+    In both modes, when several lines have the same round number, all of
+    their arrivals happen in that round, in the order the lines appear.
+
     === Attributes ===
     csv:
         A dictionary representing new arrivals based on the CSV file.
         The keys represent the round numbers.
         The values contain a list of starting and target floor pairs.
+        This is always empty in streaming mode.
+    streaming: whether the file is read incrementally
+
+    === Private Attributes ===
+    _rounds: the rounds in csv, in increasing order, or None if they haven't
+             been needed yet
+    _filename: the path of the CSV file
+    _file: the open file being streamed, or None once it has been read to
+           the end or closed (or if not streaming)
+    _position: the position in the file to carry on reading from if it was
+               closed before being read to the end, or None
+    _buffer: a heap of the lines read from the file but not generated yet,
+             as (round number, line number, floor pairs) tuples
+    _read_ahead: the maximum number of lines held in _buffer
+    _lines_read: the number of lines read from the file so far
     """
 
     csv: Dict[int, List[int]]
-
-    def __init__(self, max_floor: int, filename: str) -> None:
+    streaming: bool
+    _rounds: Optional[List[int]]
+    _filename: str
+    _file: Optional[TextIO]
+    _position: Optional[int]
+    _buffer: List[Tuple[int, int, List[int]]]
+    _read_ahead: int
+    _lines_read: int
+
+    def __init__(self, max_floor: int, filename: str,
+                 streaming: bool = False, read_ahead: int = 1024) -> None:
         """Initialize a new FileArrivals algorithm from the given file.
 
         The num_people attribute of every FileArrivals instance is set to None,
@@ -143,18 +246,61 @@ class FileArrivals(ArrivalGenerator):
 
         Precondition:
             <filename> refers to a valid CSV file, following the specified
-            format and restrictions from the assignment handout.
+            format and restrictions from the assignment handout, except that
+            round numbers may be repeated.
+            If streaming, rounds are generated in increasing order, and every
+            line appears fewer than <read_ahead> lines after any line with a
+            larger round number (this always holds if the file is sorted by
+            round number).
+            read_ahead >= 1
         """
         ArrivalGenerator.__init__(self, max_floor, None)
         self.csv = {}
-        with open(filename) as csvfile:
+        self.streaming = streaming
+        self._rounds = None
+        self._filename = filename
+        self._file = None
+        self._position = None
+        self._buffer = []
+        self._read_ahead = read_ahead
+        self._lines_read = 0
+        if streaming:
+            self._file = open(filename, newline='')
+            return
+
+        with open(filename, newline='') as csvfile:
             reader = csv.reader(csvfile)
             for line in reader:
-                round_int = []
-                for i in line:
-                    if not i.isalpha() and not len(i) == 0:
-                        round_int.append(int(i))
-                self.csv[round_int[0]] = round_int[1:]
+                round_int = parse_arrival_line(line)
+                if len(round_int) == 0:
+                    continue
+                self.csv.setdefault(round_int[0], []).extend(round_int[1:])
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Return the state of this generator for pickling.
+
+        A file being streamed is stored as its position, and re-opened at
+        that position when unpickled.
+        """
+        state = self.__dict__.copy()
+        if self._file is not None:
+            state['_file'] = self._file.tell()
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Restore this generator from its pickled state."""
+        self.__dict__.update(state)
+        if self._file is not None:
+            position = self._file
+            self._file = open(self._filename, newline='')
+            self._file.seek(position)
+
+    def close(self) -> None:
+        """Close the file being streamed, if it is open."""
+        if self._file is not None:
+            self._position = self._file.tell()
+            self._file.close()
+            self._file = None
 
     def generate(self, round_num: int) -> Dict[int, List[Person]]:
         """Return the new arrivals for the simulation at the given round.
@@ -163,21 +309,84 @@ class FileArrivals(ArrivalGenerator):
         arrived starting at that floor.
 
         """
+        if self.streaming:
+            floors = self._read_round(round_num)
+            if len(floors) == 0:
+                return {}
+            people = self._people_from_floors(floors)
+            return ArrivalGenerator.generate_new_arrivals(self, people)
+
         if round_num not in self.csv:
             return {}
 
         people = self.generate_people(round_num)
         return ArrivalGenerator.generate_new_arrivals(self, people)
 
+    def next_arrival_round(self, round_num: int) -> Optional[int]:
+        """Return the first round, from the given round on, in which anyone
+        arrives, or None if nobody will ever arrive again.
+        """
+        if self.streaming:
+            self._fill_buffer()
+            if len(self._buffer) == 0:
+                return None
+            # Lines for earlier rounds are only discarded by generate.
+            return max(self._buffer[0][0], round_num)
+
+        if self._rounds is None:
+            self._rounds = sorted(self.csv)
+        i = bisect.bisect_left(self._rounds, round_num)
+        if i == len(self._rounds):
+            return None
+        return self._rounds[i]
+
     def generate_people(self, round_num: int) -> List[Person]:
         """Returns a list of generated people based on the CSV file format
         """
+        return self._people_from_floors(self.csv[round_num])
+
+    def _people_from_floors(self, floors: List[int]) -> List[Person]:
+        """Returns a list of people from a list of starting and target floor
+        pairs.
+        """
         people = []
-        for i in range(0, len(self.csv[round_num]), 2):
-            people.append(Person(self.csv[round_num][i],
-                                 self.csv[round_num][i + 1]))
+        for i in range(0, len(floors), 2):
+            people.append(self.person_type(floors[i], floors[i + 1]))
         return people
 
+    def _fill_buffer(self) -> None:
+        """Read lines from the file until the buffer is full or the whole
+        file has been read.
+        """
+        if self._position is not None:
+            self._file = open(self._filename, newline='')
+            self._file.seek(self._position)
+            self._position = None
+        while self._file is not None and len(self._buffer) < self._read_ahead:
+            line = self._file.readline()
+            if line == '':
+                self._file.close()
+                self._file = None
+                break
+            round_int = parse_arrival_line(next(csv.reader([line])))
+            if len(round_int) > 0:
+                heapq.heappush(self._buffer, (round_int[0], self._lines_read,
+                                              round_int[1:]))
+            self._lines_read += 1
+
+    def _read_round(self, round_num: int) -> List[int]:
+        """Return the starting and target floor pairs of every line for the
+        given round, and discard any lines for earlier rounds.
+        """
+        floors = []
+        self._fill_buffer()
+        while len(self._buffer) > 0 and self._buffer[0][0] <= round_num:
+            line_round, _, pairs = heapq.heappop(self._buffer)
+            if line_round == round_num:
+                floors.extend(pairs)
+            self._fill_buffer()
+        return floors
+
 
 ###############################################################################
 # Elevator moving algorithms
@@ -197,7 +406,15 @@ class Direction(Enum):
 
 class MovingAlgorithm:
     """An algorithm to make decisions for moving an elevator at each round.
+
+    === Attributes ===
+    idle_when_quiescent: whether this algorithm always keeps every elevator
+                         still when nobody is waiting and every elevator is
+                         empty, and then keeps doing so (without using any
+                         randomness) for as long as that lasts. Simulations
+                         can skip over such rounds without calling it.
     """
+    idle_when_quiescent: bool = False
 
     def move_elevators(self,
                        elevators: List[Elevator],
@@ -216,13 +433,8 @@ class MovingAlgorithm:
         raise NotImplementedError
 
     def check_waiting(self, waiting: Dict[int, List[Person]]) -> bool:
-        """Checks whether there are people waiting on at least one floor."""
-        no_people_waiting = True
-        for floor in waiting:
-            if len(waiting[floor]) > 0:
-                no_people_waiting = False
-                break
-        return no_people_waiting
+        """Checks whether there are no people waiting on any floor."""
+        return len(occupancy.waiting_floors(waiting)) == 0
 
 
 class RandomAlgorithm(MovingAlgorithm):
@@ -266,6 +478,7 @@ class PushyPassenger(MovingAlgorithm):
     If the elevator isn't empty, it moves towards the target floor of the
     *first* passenger who boarded the elevator.
     """
+    idle_when_quiescent = True
 
     def move_elevators(self,
                        elevators: List[Elevator],
@@ -283,9 +496,9 @@ class PushyPassenger(MovingAlgorithm):
             - An elevator at the top floor cannot move up.
         """
         directions = []
+        lowest_floor = self.get_lowest_floor(waiting)
         for elevator in elevators:
             if elevator.is_empty():
-                lowest_floor = self.get_lowest_floor(waiting)
                 if lowest_floor == 0:
                     directions.append(Direction.STAY)
                 elif lowest_floor < elevator.current_floor:
@@ -295,20 +508,23 @@ class PushyPassenger(MovingAlgorithm):
                 else:
                     directions.append(Direction.UP)
             else:
-                if elevator.passengers[0].target < elevator.current_floor:
+                target = elevator.first_passenger().target
+                if target < elevator.current_floor:
                     directions.append(Direction.DOWN)
-                elif elevator.passengers[0].target == elevator.current_floor:
+                elif target == elevator.current_floor:
                     directions.append(Direction.STAY)
                 else:
                     directions.append(Direction.UP)
         return directions
 
     def get_lowest_floor(self, waiting: Dict[int, List[Person]]) -> int:
-        """Returns the lowest floor that has at least one person waiting."""
-        for floor, people in sorted(waiting.items()):
-            if len(people) > 0:
-                return floor
-        return 0
+        """Returns the lowest floor that has at least one person waiting, or 0
+        if nobody is waiting.
+        """
+        lowest_floor = occupancy.waiting_floors(waiting).lowest()
+        if lowest_floor is None:
+            return 0
+        return lowest_floor
 
 
 class ShortSighted(MovingAlgorithm):
@@ -322,6 +538,8 @@ class ShortSighted(MovingAlgorithm):
 
     In this case, the order in which people boarded does *not* matter.
     """
+    idle_when_quiescent = True
+
     def move_elevators(self,
                        elevators: List[Elevator],
                        waiting: Dict[int, List[Person]],
@@ -337,28 +555,20 @@ class ShortSighted(MovingAlgorithm):
             - An elevator at the top floor cannot move up.
         """
         directions = []
+        occupied = occupancy.waiting_floors(waiting)
         for elevator in elevators:
             if elevator.is_empty():
-                if self.check_waiting(waiting):
-                    directions.append(Direction.STAY)
-                else:
-                    closest_floor = self.empty_closest_floor(elevator,
-                                                             waiting,
-                                                             max_floor)
-                    if closest_floor < elevator.get_floor():
-                        directions.append(Direction.DOWN)
-                    elif closest_floor == elevator.get_floor():
-                        directions.append(Direction.STAY)
-                    else:
-                        directions.append(Direction.UP)
+                closest_floor = occupied.closest(elevator.get_floor())
             else:
-                closest_floor = self.closest_target_floor(elevator, max_floor)
-                if closest_floor < elevator.get_floor():
-                    directions.append(Direction.DOWN)
-                elif closest_floor == elevator.get_floor():
-                    directions.append(Direction.STAY)
-                else:
-                    directions.append(Direction.UP)
+                closest_floor = occupancy.closest_floor(
+                    elevator.get_target_floors(), elevator.get_floor())
+            if closest_floor is None or \
+                    closest_floor == elevator.get_floor():
+                directions.append(Direction.STAY)
+            elif closest_floor < elevator.get_floor():
+                directions.append(Direction.DOWN)
+            else:
+                directions.append(Direction.UP)
         return directions
 
     def empty_closest_floor(self, elevator: Elevator,
@@ -367,29 +577,30 @@ class ShortSighted(MovingAlgorithm):
         """
         Returns the closest floor to the elevator that contains waiting people.
         This method is designed for empty elevators.
+
+        Ties are broken in favour of the lower floor, and the elevator's own
+        floor is returned if nobody is waiting.
         """
-        closest_floor = elevator.get_floor()
-        floors_to_check = self.floor_check(elevator, max_floor)
-        for floor in floors_to_check:
-            if len(waiting[floor]) > 0:
-                closest_floor = floor
-                break
+        occupied = occupancy.waiting_floors(waiting)
+        closest_floor = occupied.closest(elevator.get_floor())
+        if closest_floor is None:
+            return elevator.get_floor()
         return closest_floor
 
     def floor_check(self, elevator: Elevator, max_floor: int) -> List[int]:
         """
         Returns a list of all possible floors by order of
         closest distance to elevator
+
+        The closest floor choices no longer go through this list (see
+        occupancy.FloorIndex), so it is only kept for callers of this method.
         """
-        floors = []
+        floors = [elevator.get_floor()]
         current_floor = elevator.get_floor()
-        floors.append(current_floor)
-        max_distance = max_floor - 1
-        for i in range(1, max_distance + 1):
+        for i in range(1, max_floor):
             floors.append(current_floor - i)
             floors.append(current_floor + i)
-        filtered_floors = self.filter_impossible_floors(floors, max_floor)
-        return filtered_floors
+        return self.filter_impossible_floors(floors, max_floor)
 
     def filter_impossible_floors(self, floors: List[int],
                                  max_floor: int) -> List[int]:
@@ -397,37 +608,120 @@ class ShortSighted(MovingAlgorithm):
         Returns a filtered list of possible floors
         based on the maximum floor.
         """
-        filtered_floors = []
-        for floor in floors:
-            if 0 < floor <= max_floor:
-                filtered_floors.append(floor)
-        return filtered_floors
+        return [floor for floor in floors if 0 < floor <= max_floor]
 
     def closest_target_floor(self, elevator: Elevator, max_floor: int) -> int:
         """
         Returns the closest target floor based on
         the elevators current passengers and current floor.
         This method is designed for non-empty elevators.
+
+        Ties are broken in favour of the lower floor.
         """
-        closest_floor = elevator.get_floor()
-        closest_floors = self.floor_check(elevator, max_floor)
-        passenger_floors = []
-        for passenger in elevator.get_passengers():
-            passenger_floors.append(passenger.get_target_floor())
-        for floor in closest_floors:
-            if floor in passenger_floors:
-                closest_floor = floor
-                break
+        closest_floor = occupancy.closest_floor(elevator.get_target_floors(),
+                                                elevator.get_floor())
+        if closest_floor is None:
+            return elevator.get_floor()
         return closest_floor
 
 
+class LookAlgorithm(MovingAlgorithm):
+    """A moving algorithm that sweeps each elevator up and down the building
+    (directional collective control, or LOOK).
+
+    Each elevator keeps travelling in its current direction while any of its
+    passengers' target floors (car calls), or any floor with people waiting
+    (hall calls), lies ahead of it, picking up and dropping off people on the
+    way. When nothing lies ahead it reverses, and when there are no calls at
+    all it stops. A stopped elevator sets off towards the closest call, with
+    ties going to the lower floor. Full elevators ignore hall calls.
+
+    Car calls come from each elevator's sorted target floors and hall calls
+    from the simulation's index of waiting floors, so each decision only
+    looks at the lowest and highest call, not at every floor.
+
+    === Private Attributes ===
+    _directions: the direction each elevator travelled in the last round
+    """
+    idle_when_quiescent = True
+    _directions: List[Direction]
+
+    def __init__(self) -> None:
+        self._directions = []
+
+    def move_elevators(self,
+                       elevators: List[Elevator],
+                       waiting: Dict[int, List[Person]],
+                       max_floor: int) -> List[Direction]:
+        """Return a list of directions for each elevator to move to.
+
+        As input, this method receives the list of elevators in the simulation,
+        a dictionary mapping floor number to a list of people waiting on
+        that floor, and the maximum floor number in the simulation.
+
+        Note that each returned direction should be valid:
+            - An elevator at Floor 1 cannot move down.
+            - An elevator at the top floor cannot move up.
+        """
+        if len(self._directions) != len(elevators):
+            self._directions = [Direction.STAY] * len(elevators)
+        occupied = occupancy.waiting_floors(waiting)
+        lowest_hall = occupied.lowest()
+        highest_hall = occupied.highest()
+
+        for i, elevator in enumerate(elevators):
+            floor = elevator.get_floor()
+            targets = elevator.get_target_floors()
+            lowest = targets[0] if len(targets) > 0 else None
+            highest = targets[-1] if len(targets) > 0 else None
+            closest = occupancy.closest_floor(targets, floor)
+            if elevator.is_not_full() and lowest_hall is not None:
+                lowest = lowest_hall if lowest is None else \
+                    min(lowest, lowest_hall)
+                highest = highest_hall if highest is None else \
+                    max(highest, highest_hall)
+                closest_hall = occupied.closest(floor)
+                if closest is None or (abs(closest_hall - floor), closest_hall) \
+                        < (abs(closest - floor), closest):
+                    closest = closest_hall
+            self._directions[i] = self.next_direction(
+                self._directions[i], floor, lowest, highest, closest)
+        return list(self._directions)
+
+    def next_direction(self, direction: Direction, floor: int,
+                       lowest: Optional[int], highest: Optional[int],
+                       closest: Optional[int]) -> Direction:
+        """Return the direction an elevator on the given floor, which last
+        travelled in the given direction, should move in.
+
+        <lowest>, <highest> and <closest> are the lowest call, the highest
+        call and the call closest to the elevator (with ties going to the
+        lower floor), or None if the elevator has no calls.
+        """
+        calls_above = highest is not None and highest > floor
+        calls_below = lowest is not None and lowest < floor
+        if direction == Direction.UP and calls_above:
+            return Direction.UP
+        elif direction == Direction.DOWN and calls_below:
+            return Direction.DOWN
+        elif direction != Direction.STAY and (calls_above or calls_below):
+            # Nothing lies ahead, so turn around.
+            return Direction.UP if calls_above else Direction.DOWN
+        elif closest is None or closest == floor:
+            return Direction.STAY
+        elif closest > floor:
+            return Direction.UP
+        return Direction.DOWN
+
+
 if __name__ == '__main__':
     # Don't forget to check your work regularly with python_ta!
     import python_ta
 
     python_ta.check_all(config={
         'allowed-io': ['__init__'],
-        'extra-imports': ['entities', 'random', 'csv', 'enum'],
+        'extra-imports': ['entities', 'occupancy', 'random', 'bisect', 'csv',
+                          'enum', 'heapq'],
         'max-nested-blocks': 4,
         'disable': ['R0201'],
         'max-attributes': 12
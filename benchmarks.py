@@ -0,0 +1,323 @@
+"""CSC148 Assignment 1 - Benchmarks
+
+=== CSC148 Fall 2018 ===
+Department of Computer Science,
+University of Toronto
+
+=== Module Description ===
+
+This file contains a benchmark suite for the simulation, and a way to compare
+its results against a stored baseline to catch performance regressions.
+
+The suite times:
+    - whole runs of a headless Simulation, over a grid of moving algorithms,
+      building sizes and arrival rates (see sweep.py for the grid format)
+    - microbenchmarks of the functions that dominate those runs, each called
+      on the state of a simulation part way through a run
+
+Every benchmark is repeated, and its best time is the one compared, since
+slower repeats measure interference from the rest of the machine rather than
+the code. The random module is seeded before each repeat, so every repeat, and
+every run of the suite, does exactly the same work. Only compare results from
+the same machine, run while it is otherwise idle.
+
+Results are written as JSON. For example, to store a baseline, change the code
+and then check it for regressions:
+    python benchmarks.py run --output baseline.json
+    python benchmarks.py run --output current.json --compare baseline.json
+or, to compare two stored results:
+    python benchmarks.py compare baseline.json current.json
+If run --compare is given no --output, the results are written to standard
+output and the comparison table to standard error.
+"""
+import argparse
+import csv
+import gc
+import json
+import os
+import pickle
+import platform
+import random
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, TextIO
+
+import algorithms
+from simulation import Simulation
+from sweep import build_config, expand_grid
+
+# The grid of whole simulation runs timed by default.
+DEFAULT_GRID = {
+    'num_floors': [6, 50, 200],
+    'num_elevators': [1, 8, 64],
+    'elevator_capacity': [10],
+    'num_people_per_round': [1, 5, 20],
+    'moving_algorithm': ['RandomAlgorithm', 'PushyPassenger', 'ShortSighted']
+}
+
+# The configuration whose state part way through a run the microbenchmarks
+# are called on.
+MICRO_CELL = {
+    'num_floors': 50,
+    'num_elevators': 16,
+    'elevator_capacity': 10,
+    'num_people_per_round': 10,
+    'moving_algorithm': 'ShortSighted'
+}
+MICRO_ROUNDS = 100
+
+# The number of lines in the arrivals file read by the FileArrivals benchmark.
+FILE_ARRIVALS_LINES = 20000
+
+# By default, a benchmark has regressed if its best time is more than this
+# fraction slower than its baseline. Even best times vary by around a tenth
+# between runs on a quiet machine, so smaller thresholds flag noise.
+DEFAULT_THRESHOLD = 0.15
+
+
+def time_calls(setup: Callable[[], Any], function: Callable[[Any], Any],
+               number: int, repeat: int) -> Dict[str, Any]:
+    """Time <number> calls of function, <repeat> times, and return the
+    result: the best and every repeat's total time in seconds, and <number>.
+
+    Each call is passed a fresh value returned by setup, which is not timed.
+    The random module is seeded with 0 at the start of each repeat. Like
+    timeit, garbage collection is turned off during the calls, so the times
+    don't depend on garbage left behind by earlier benchmarks.
+    """
+    times = []
+    for _ in range(repeat):
+        random.seed(0)
+        total = 0.0
+        gc.collect()
+        gc.disable()
+        try:
+            for _ in range(number):
+                argument = setup()
+                start = time.perf_counter()
+                function(argument)
+                total += time.perf_counter() - start
+        finally:
+            gc.enable()
+        times.append(total)
+    return {'best': min(times), 'times': times, 'number': number}
+
+
+def run_benchmarks(grid: Dict[str, List[Any]],
+                   num_rounds: int, repeat: int) -> Dict[str, Dict[str, Any]]:
+    """Time <num_rounds> rounds of a headless simulation of every cell of the
+    given grid, <repeat> times each, and return the results keyed by
+    benchmark name.
+    """
+    results = {}
+    for cell in expand_grid(grid):
+        name = 'run/{moving_algorithm}/floors={num_floors}/' \
+               'elevators={num_elevators}/capacity={elevator_capacity}/' \
+               'people={num_people_per_round}'.format(**cell)
+        results[name] = time_calls(lambda: Simulation(build_config(cell)),
+                                   lambda sim: sim.run(num_rounds), 1, repeat)
+    return results
+
+
+def _prepared_simulation() -> bytes:
+    """Return a headless simulation of MICRO_CELL, pickled after running
+    MICRO_ROUNDS rounds.
+    """
+    random.seed(0)
+    sim = Simulation(build_config(MICRO_CELL))
+    sim.run(MICRO_ROUNDS)
+    return pickle.dumps(sim)
+
+
+def _write_arrivals_file(path: str, max_floor: int) -> None:
+    """Write FILE_ARRIVALS_LINES lines of random arrivals to a CSV file at
+    the given path.
+    """
+    rng = random.Random(0)
+    with open(path, 'w', newline='') as arrivals_file:
+        writer = csv.writer(arrivals_file)
+        for round_num in range(FILE_ARRIVALS_LINES):
+            line = [round_num]
+            for _ in range(rng.randint(1, 5)):
+                line.extend(rng.sample(range(1, max_floor + 1), 2))
+            writer.writerow(line)
+
+
+def run_microbenchmarks(number: int,
+                        repeat: int) -> Dict[str, Dict[str, Any]]:
+    """Time <number> calls of each of the simulation's hot functions,
+    <repeat> times each, and return the results keyed by benchmark name.
+    """
+    state = _prepared_simulation()
+
+    def fresh() -> Simulation:
+        return pickle.loads(state)
+
+    def after_leaving() -> Simulation:
+        sim = fresh()
+        sim._handle_leaving()
+        return sim
+
+    def moving_args(sim: Simulation) -> List[Any]:
+        return [sim.elevators, sim.waiting, sim.num_floors]
+
+    short_sighted = algorithms.ShortSighted()
+    pushy = algorithms.PushyPassenger()
+    sim = fresh()
+    empty = sim.elevators[0]
+    for elevator in sim.elevators:
+        if elevator.is_empty():
+            empty = elevator
+    results = {
+        'micro/Simulation._handle_leaving': time_calls(
+            fresh, lambda s: s._handle_leaving(), number, repeat),
+        'micro/Simulation._handle_boarding': time_calls(
+            after_leaving, lambda s: s._handle_boarding(), number, repeat),
+        'micro/ShortSighted.move_elevators': time_calls(
+            lambda: moving_args(sim),
+            lambda args: short_sighted.move_elevators(*args), number, repeat),
+        'micro/ShortSighted.floor_check': time_calls(
+            lambda: None,
+            lambda _: short_sighted.floor_check(empty, sim.num_floors),
+            number, repeat),
+        'micro/ShortSighted.empty_closest_floor': time_calls(
+            lambda: None,
+            lambda _: short_sighted.empty_closest_floor(
+                empty, sim.waiting, sim.num_floors), number, repeat),
+        'micro/PushyPassenger.get_lowest_floor': time_calls(
+            lambda: None, lambda _: pushy.get_lowest_floor(sim.waiting),
+            number, repeat)
+    }
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'arrivals.csv')
+        _write_arrivals_file(path, MICRO_CELL['num_floors'])
+        # Reading a whole file is much slower than the other functions.
+        results['micro/FileArrivals.__init__'] = time_calls(
+            lambda: None,
+            lambda _: algorithms.FileArrivals(MICRO_CELL['num_floors'], path),
+            1, repeat)
+    return results
+
+
+def run_suite(grid: Optional[Dict[str, List[Any]]] = None,
+              num_rounds: int = 500, repeat: int = 5,
+              number: int = 200) -> Dict[str, Any]:
+    """Run the whole benchmark suite, and return its results together with
+    a description of the machine and settings it was run with.
+
+    By default, runs are timed over DEFAULT_GRID.
+    """
+    if grid is None:
+        grid = DEFAULT_GRID
+    results = run_benchmarks(grid, num_rounds, repeat)
+    results.update(run_microbenchmarks(number, repeat))
+    return {
+        'machine': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'processor': platform.processor()
+        },
+        'settings': {'num_rounds': num_rounds, 'repeat': repeat,
+                     'number': number},
+        'results': results
+    }
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any],
+            threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """Return one row for each benchmark in both of the given suite results,
+    with its best baseline and current times, the ratio of the two, and
+    whether it has regressed by more than <threshold>.
+
+    Benchmarks that are only in one of the results are skipped.
+    """
+    rows = []
+    for name, result in current['results'].items():
+        if name not in baseline['results']:
+            continue
+        before = baseline['results'][name]['best']
+        after = result['best']
+        ratio = after / before if before > 0 else float('inf')
+        rows.append({'name': name, 'baseline': before, 'current': after,
+                     'ratio': ratio, 'regressed': ratio > 1 + threshold})
+    return rows
+
+
+def print_comparison(rows: List[Dict[str, Any]],
+                     output: TextIO = sys.stdout) -> None:
+    """Print a table of the given comparison rows to <output>."""
+    width = max([len(row['name']) for row in rows] + [len('benchmark')])
+    print(f'{"benchmark":<{width}}  {"baseline":>10}  {"current":>10}  ratio',
+          file=output)
+    for row in rows:
+        flag = '  REGRESSED' if row['regressed'] else ''
+        print(f'{row["name"]:<{width}}  {row["baseline"]:>10.6f}  '
+              f'{row["current"]:>10.6f}  {row["ratio"]:.2f}{flag}',
+              file=output)
+
+
+def _load(path: str) -> Dict[str, Any]:
+    """Return the suite results stored in the given JSON file."""
+    with open(path) as results_file:
+        return json.load(results_file)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run or compare benchmarks as described by the given command line
+    arguments, and return the exit status: 1 if a comparison found a
+    regression, and 0 otherwise.
+    """
+    parser = argparse.ArgumentParser(
+        description='Benchmark the elevator simulation.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help='run the benchmark suite')
+    run_parser.add_argument('--rounds', type=int, default=500)
+    run_parser.add_argument('--repeat', type=int, default=5)
+    run_parser.add_argument('--number', type=int, default=200,
+                            help='calls per repeat of each microbenchmark')
+    run_parser.add_argument('--output', default=None,
+                            help='JSON file to write (default: standard '
+                                 'output)')
+    run_parser.add_argument('--compare', default=None, metavar='BASELINE',
+                            help='JSON file of baseline results to compare '
+                                 'against')
+    run_parser.add_argument('--threshold', type=float,
+                            default=DEFAULT_THRESHOLD)
+    compare_parser = commands.add_parser(
+        'compare', help='compare two stored results')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float,
+                                default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        current = run_suite(None, args.rounds, args.repeat, args.number)
+        if args.output is None:
+            json.dump(current, sys.stdout, indent=2)
+            print()
+        else:
+            with open(args.output, 'w') as results_file:
+                json.dump(current, results_file, indent=2)
+        if args.compare is None:
+            return 0
+        baseline = _load(args.compare)
+    else:
+        baseline = _load(args.baseline)
+        current = _load(args.current)
+
+    rows = compare(baseline, current, args.threshold)
+    # When the results were written to standard output, the table goes to
+    # standard error so the results can still be parsed as JSON.
+    if args.command == 'run' and args.output is None:
+        print_comparison(rows, sys.stderr)
+    else:
+        print_comparison(rows)
+    return 1 if any(row['regressed'] for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,263 @@
+"""CSC148 Assignment 1 - Binary Arrival Traces
+
+=== CSC148 Fall 2018 ===
+Department of Computer Science,
+University of Toronto
+
+=== Module Description ===
+
+This file contains a compact binary format for arrival traces, a converter
+from the CSV format read by FileArrivals, and BinaryFileArrivals, an arrival
+generator that replays a binary trace without parsing it.
+
+A binary trace is laid out as follows (all values little-endian):
+    - A header: the magic bytes MAGIC, the format version (uint32), the
+      number of rounds covered by the index (uint32) and the number of
+      arrival records (uint64).
+    - The round index: one uint64 per round plus one, where entry r is the
+      number of records before round r. The records for round r are records
+      index[r] up to index[r + 1].
+    - The arrival records, sorted by round: three int32 values each, the
+      round number, the starting floor and the target floor.
+
+BinaryFileArrivals memory-maps the file, so a round's arrivals are a slice of
+the mapped pages. Repeated replays, and several worker processes replaying the
+same trace, share the same pages through the operating system's page cache.
+Closing the generator unmaps and closes the file; it is mapped again the next
+time it is read.
+
+Run this file to convert a trace from the command line:
+    python binary_trace.py arrivals.csv arrivals.bin
+"""
+import bisect
+import csv
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from typing import Any, Dict, List, Optional
+
+from algorithms import ArrivalGenerator, parse_arrival_line
+from entities import Person
+
+MAGIC = b'ELVTRACE'
+VERSION = 1
+# Magic bytes, version, number of rounds, number of records.
+HEADER = struct.Struct('<8sIIQ')
+RECORD_FIELDS = 3
+
+
+def _little_endian(values: array) -> array:
+    """Return the given array with its values in little-endian byte order.
+    """
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+
+def convert_csv(csv_path: str, binary_path: str) -> int:
+    """Convert the CSV arrival trace at csv_path into a binary trace at
+    binary_path, and return the number of arrivals in it.
+
+    As in FileArrivals, lines with the same round number are merged in the
+    order they appear. Traces that are already sorted by round number are
+    converted in a single pass without holding them in memory; unsorted
+    traces have their records sorted in memory.
+
+    Precondition: <csv_path> refers to a valid CSV arrivals file.
+    """
+    counts = {}
+    last_round = -1
+    in_order = True
+    directory = os.path.dirname(os.path.abspath(binary_path))
+    with tempfile.TemporaryFile(dir=directory) as records_file:
+        with open(csv_path, newline='') as csv_file:
+            for line in csv.reader(csv_file):
+                numbers = parse_arrival_line(line)
+                if len(numbers) == 0:
+                    continue
+                round_num = numbers[0]
+                if round_num < last_round:
+                    in_order = False
+                last_round = max(last_round, round_num)
+                records = array('i')
+                for i in range(1, len(numbers), 2):
+                    records.extend((round_num, numbers[i], numbers[i + 1]))
+                _little_endian(records).tofile(records_file)
+                counts[round_num] = (counts.get(round_num, 0) +
+                                     len(records) // RECORD_FIELDS)
+
+        num_rounds = last_round + 1
+        index = array('Q', [0] * (num_rounds + 1))
+        for round_num in range(num_rounds):
+            index[round_num + 1] = index[round_num] + counts.get(round_num, 0)
+        num_records = index[num_rounds] if num_rounds > 0 else 0
+
+        with open(binary_path, 'wb') as binary_file:
+            binary_file.write(HEADER.pack(MAGIC, VERSION, num_rounds,
+                                          num_records))
+            _little_endian(index).tofile(binary_file)
+            records_file.seek(0)
+            if in_order:
+                while True:
+                    chunk = records_file.read(1 << 20)
+                    if len(chunk) == 0:
+                        break
+                    binary_file.write(chunk)
+            else:
+                _sorted_records(records_file, index,
+                                num_records).tofile(binary_file)
+    return num_records
+
+
+def _sorted_records(records_file: Any, index: array,
+                    num_records: int) -> array:
+    """Return the records in records_file stably sorted by round number,
+    using the round index to place each record directly.
+    """
+    unsorted = array('i')
+    unsorted.frombytes(records_file.read())
+    unsorted = _little_endian(unsorted)
+    result = array('i', bytes(4 * RECORD_FIELDS * num_records))
+    next_slot = array('Q', index)
+    for i in range(0, len(unsorted), RECORD_FIELDS):
+        slot = next_slot[unsorted[i]] * RECORD_FIELDS
+        next_slot[unsorted[i]] += 1
+        result[slot:slot + RECORD_FIELDS] = unsorted[i:i + RECORD_FIELDS]
+    return _little_endian(result)
+
+
+class BinaryFileArrivals(ArrivalGenerator):
+    """Generate arrivals from a memory-mapped binary trace.
+
+    This behaves like FileArrivals, but reading a round's arrivals is a slice
+    of the mapped file rather than parsing text.
+
+    === Attributes ===
+    filename: the path of the binary trace
+    num_rounds: the number of rounds covered by the trace's index
+    num_records: the number of arrivals in the trace
+
+    === Private Attributes ===
+    _file: the open trace file, or None if it has been closed
+    _map: the memory map of the trace file, or None if it has been closed
+    _index: the trace's round index, or None if it has been closed
+    _records: the trace's arrival records, three values per record, or None
+              if it has been closed
+    """
+    filename: str
+    num_rounds: int
+    num_records: int
+    _file: Optional[Any]
+    _map: Optional[mmap.mmap]
+    _index: Optional[memoryview]
+    _records: Optional[memoryview]
+
+    def __init__(self, max_floor: int, filename: str) -> None:
+        """Initialize a new BinaryFileArrivals algorithm from the given file.
+
+        Precondition: <filename> refers to a binary trace written by
+        convert_csv, and this machine is little-endian.
+        """
+        ArrivalGenerator.__init__(self, max_floor, None)
+        self.filename = filename
+        self._open()
+
+    def _open(self) -> None:
+        """Open and memory-map this generator's trace file."""
+        self._file = open(self.filename, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.num_rounds, self.num_records = \
+            HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{self.filename} is not a binary arrival trace')
+        view = memoryview(self._map)
+        index_end = HEADER.size + 8 * (self.num_rounds + 1)
+        self._index = view[HEADER.size:index_end].cast('Q')
+        self._records = view[index_end:].cast('i')
+        view.release()
+
+    def close(self) -> None:
+        """Unmap and close the trace file, if it is open.
+
+        The memory map can't be closed while a view returned by round_records
+        is still in use; if one is, the file is still closed, the map is left
+        to be closed when the view is released, and BufferError is raised.
+        """
+        if self._file is None:
+            return
+        trace_file, memory_map = self._file, self._map
+        self._index.release()
+        self._records.release()
+        self._file = self._map = self._index = self._records = None
+        try:
+            memory_map.close()
+        finally:
+            trace_file.close()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Return the state of this generator for pickling, without the open
+        file and memory map, which are re-opened when unpickled.
+        """
+        state = self.__dict__.copy()
+        for name in ['_file', '_map', '_index', '_records']:
+            del state[name]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Restore this generator from its pickled state."""
+        self.__dict__.update(state)
+        self._open()
+
+    def round_records(self, round_num: int) -> memoryview:
+        """Return the records for the given round, three values per record:
+        the round number, the starting floor and the target floor.
+
+        The returned view is a slice of the mapped file; nothing is copied.
+        """
+        if self._file is None:
+            self._open()
+        if not 0 <= round_num < self.num_rounds:
+            return self._records[0:0]
+        start = self._index[round_num] * RECORD_FIELDS
+        end = self._index[round_num + 1] * RECORD_FIELDS
+        return self._records[start:end]
+
+    def next_arrival_round(self, round_num: int) -> Optional[int]:
+        """Return the first round, from the given round on, in which anyone
+        arrives, or None if nobody will ever arrive again.
+        """
+        if round_num >= self.num_rounds:
+            return None
+        if self._file is None:
+            self._open()
+        # The first round whose records end after the given round's start.
+        next_round = bisect.bisect_right(self._index,
+                                         self._index[max(round_num, 0)]) - 1
+        if next_round >= self.num_rounds:
+            return None
+        return max(next_round, round_num)
+
+    def generate(self, round_num: int) -> Dict[int, List[Person]]:
+        """Return the new arrivals for the simulation at the given round.
+
+        The returned dictionary maps floor number to the people who
+        arrived starting at that floor.
+        """
+        records = self.round_records(round_num)
+        if len(records) == 0:
+            return {}
+        people = [self.person_type(start, target)
+                  for start, target in zip(records[1::RECORD_FIELDS].tolist(),
+                                           records[2::RECORD_FIELDS].tolist())]
+        return ArrivalGenerator.generate_new_arrivals(self, people)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print(f'usage: {sys.argv[0]} ARRIVALS.csv ARRIVALS.bin')
+        sys.exit(2)
+    print(f'{convert_csv(sys.argv[1], sys.argv[2])} arrivals converted')
@@ -0,0 +1,136 @@
+"""CSC148 Assignment 1 - Checkpoints
+
+=== CSC148 Fall 2018 ===
+Department of Computer Science,
+University of Toronto
+
+=== Module Description ===
+
+This file contains functions for writing and reading checkpoint files, and
+CheckpointWriter, which writes checkpoints on a background thread so that a
+running simulation does not wait for compression or for the disk.
+
+A checkpoint file is the bytes MAGIC followed by a zlib-compressed pickle.
+Files are written to a temporary file first and then renamed, so a run that
+is interrupted part way through writing a checkpoint leaves the previous
+checkpoint intact.
+
+Only load checkpoints you trust: like any pickle, loading one can run
+arbitrary code.
+"""
+import os
+import pickle
+import threading
+import zlib
+from typing import Any, Optional, Tuple
+
+MAGIC = b'ELVCKPT1'
+# Checkpoints are mostly small integers, which compress well even at the
+# fastest level.
+COMPRESSION_LEVEL = 1
+
+
+def dumps(state: Any) -> bytes:
+    """Return the given state pickled, ready to be passed to write_checkpoint.
+    """
+    return pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def write_checkpoint(path: str, payload: bytes) -> None:
+    """Compress the given pickled state and write it to a checkpoint file at
+    the given path, replacing any checkpoint already there.
+    """
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    with open(temp_path, 'wb') as checkpoint_file:
+        checkpoint_file.write(MAGIC)
+        checkpoint_file.write(zlib.compress(payload, COMPRESSION_LEVEL))
+    os.replace(temp_path, path)
+
+
+def read_checkpoint(path: str) -> Any:
+    """Return the state stored in the checkpoint file at the given path.
+
+    Raise ValueError if the file is not a checkpoint.
+    """
+    with open(path, 'rb') as checkpoint_file:
+        data = checkpoint_file.read()
+    if not data.startswith(MAGIC):
+        raise ValueError(f'{path} is not a simulation checkpoint')
+    return pickle.loads(zlib.decompress(data[len(MAGIC):]))
+
+
+class CheckpointWriter:
+    """Writes checkpoints on a background thread.
+
+    If a new checkpoint is submitted before the previous one has started to
+    be written, only the newer one is written.
+
+    === Private Attributes ===
+    _condition: guards _pending, _closed and _error, and signals the thread
+                when either of the first two changes
+    _pending: the path and pickled state of the next checkpoint to write, or
+              None if there isn't one
+    _closed: whether close has been called
+    _error: the first error raised while writing a checkpoint, if any
+    _thread: the thread that writes the checkpoints
+    """
+    _condition: threading.Condition
+    _pending: Optional[Tuple[str, bytes]]
+    _closed: bool
+    _error: Optional[OSError]
+    _thread: threading.Thread
+
+    def __init__(self) -> None:
+        self._condition = threading.Condition()
+        self._pending = None
+        self._closed = False
+        self._error = None
+        self._thread = threading.Thread(target=self._write_pending,
+                                        daemon=True)
+        self._thread.start()
+
+    def submit(self, path: str, payload: bytes) -> None:
+        """Write the given pickled state to a checkpoint at the given path in
+        the background.
+        """
+        with self._condition:
+            self._pending = (path, payload)
+            self._condition.notify()
+
+    def close(self) -> None:
+        """Finish writing any pending checkpoint and stop the thread.
+
+        Raise the first error raised while writing a checkpoint, if any.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def _write_pending(self) -> None:
+        """Write each checkpoint as it is submitted, until closed."""
+        while True:
+            with self._condition:
+                while self._pending is None and not self._closed:
+                    self._condition.wait()
+                if self._pending is None:
+                    return
+                path, payload = self._pending
+                self._pending = None
+            try:
+                write_checkpoint(path, payload)
+            except OSError as error:
+                if self._error is None:
+                    self._error = error
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'extra-imports': ['os', 'pickle', 'threading', 'zlib'],
+        'max-nested-blocks': 4,
+        'disable': ['R0201'],
+        'max-attributes': 12
+    })
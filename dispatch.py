@@ -0,0 +1,203 @@
+"""CSC148 Assignment 1 - Group Dispatching
+
+=== CSC148 Fall 2018 ===
+Department of Computer Science,
+University of Toronto
+
+=== Module Description ===
+
+This file contains EtaDispatcher, a moving algorithm that coordinates all the
+elevators in a building, so each floor with people waiting (a hall call) is
+served by a single elevator instead of every idle elevator rushing to it.
+
+Every round, the dispatcher estimates how many rounds each elevator would take
+to reach each floor (its estimated time of arrival, or ETA), as a NumPy matrix
+with one row per elevator and one column per floor. Hall calls are assigned to
+elevators greedily, cheapest ETA first, with a penalty for each passenger and
+call an elevator already has, and each elevator then sweeps through its own
+passengers' targets and its assigned calls like LookAlgorithm.
+
+The matrix and the assignment are both kept from round to round. A row is only
+recomputed when that elevator's floor, direction, furthest stop or fullness
+has changed, and a call keeps its elevator unless that elevator has become
+full or another elevator could now reach it much sooner, so only new and
+orphaned calls are assigned each round.
+"""
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from algorithms import Direction, LookAlgorithm
+from entities import Elevator, Person
+import occupancy
+
+
+class EtaDispatcher(LookAlgorithm):
+    """A moving algorithm that assigns each hall call to one elevator by
+    estimated time of arrival.
+
+    An elevator's ETA to a floor is the number of floors it has to travel to
+    get there: directly, if it is stopped or the floor lies ahead of it, or
+    by way of its furthest stop ahead and back, if the floor lies behind it.
+    Full elevators are never assigned calls.
+
+    === Attributes ===
+    load_penalty: the number of rounds added to an elevator's ETA for each
+                  passenger it carries and each call it has been assigned
+    reassign_margin: how many rounds sooner another elevator must be able to
+                     reach a call before the call is taken away from its
+                     current elevator
+
+    === Private Attributes ===
+    _costs: the ETA of each elevator to each floor; column f - 1 is floor f
+    _row_keys: the floor, direction, furthest stop and fullness each row of
+               _costs was computed for
+    _assignment: the elevator each hall call is assigned to, keyed by floor
+
+    === Representation invariants ===
+    load_penalty >= 0
+    reassign_margin >= 0
+    """
+    load_penalty: float
+    reassign_margin: float
+    _costs: np.ndarray
+    _row_keys: List[Optional[Tuple[int, Direction, int, bool]]]
+    _assignment: Dict[int, int]
+
+    def __init__(self, load_penalty: float = 1.0,
+                 reassign_margin: float = 4.0) -> None:
+        LookAlgorithm.__init__(self)
+        self.load_penalty = load_penalty
+        self.reassign_margin = reassign_margin
+        self._costs = np.zeros((0, 0))
+        self._row_keys = []
+        self._assignment = {}
+
+    def move_elevators(self,
+                       elevators: List[Elevator],
+                       waiting: Dict[int, List[Person]],
+                       max_floor: int) -> List[Direction]:
+        """Return a list of directions for each elevator to move to.
+
+        As input, this method receives the list of elevators in the simulation,
+        a dictionary mapping floor number to a list of people waiting on
+        that floor, and the maximum floor number in the simulation.
+
+        Note that each returned direction should be valid:
+            - An elevator at Floor 1 cannot move down.
+            - An elevator at the top floor cannot move up.
+        """
+        if len(self._directions) != len(elevators) or \
+                self._costs.shape[1] != max_floor:
+            self._directions = [Direction.STAY] * len(elevators)
+            self._costs = np.zeros((len(elevators), max_floor))
+            self._row_keys = [None] * len(elevators)
+            self._assignment = {}
+
+        targets = [elevator.get_target_floors() for elevator in elevators]
+        self._update_costs(elevators, targets)
+        calls = list(occupancy.waiting_floors(waiting))
+        self._assign(elevators, calls)
+
+        assigned = [[] for _ in elevators]
+        for floor, car in self._assignment.items():
+            assigned[car].append(floor)
+        for i, elevator in enumerate(elevators):
+            stops = sorted(set(targets[i]).union(assigned[i]))
+            if len(stops) == 0:
+                self._directions[i] = Direction.STAY
+                continue
+            floor = elevator.get_floor()
+            self._directions[i] = self.next_direction(
+                self._directions[i], floor, stops[0], stops[-1],
+                occupancy.closest_floor(stops, floor))
+        return list(self._directions)
+
+    def _update_costs(self, elevators: List[Elevator],
+                      targets: List[List[int]]) -> None:
+        """Recompute the rows of the ETA matrix for the elevators whose state
+        has changed since their row was last computed.
+        """
+        changed = []
+        for i, elevator in enumerate(elevators):
+            floor = elevator.get_floor()
+            direction = self._directions[i]
+            if direction == Direction.UP:
+                turn = max(floor, targets[i][-1] if targets[i] else floor)
+            elif direction == Direction.DOWN:
+                turn = min(floor, targets[i][0] if targets[i] else floor)
+            else:
+                turn = floor
+            key = (floor, direction, turn, elevator.is_not_full())
+            if key != self._row_keys[i]:
+                self._row_keys[i] = key
+                changed.append(i)
+        if len(changed) == 0:
+            return
+
+        # Recompute all the changed rows at once, one elevator per row.
+        keys = [self._row_keys[i] for i in changed]
+        floor = np.array([key[0] for key in keys])[:, np.newaxis]
+        direction = np.array([key[1].value for key in keys])[:, np.newaxis]
+        turn = np.array([key[2] for key in keys])[:, np.newaxis]
+        not_full = np.array([key[3] for key in keys])[:, np.newaxis]
+        floors = np.arange(1, self._costs.shape[1] + 1)[np.newaxis, :]
+        # How far each floor lies ahead of the elevator (negative if behind).
+        ahead = np.where(direction == 0, np.abs(floors - floor),
+                         (floors - floor) * direction)
+        behind = np.abs(turn - floor) + np.abs(turn - floors)
+        rows = np.where(ahead >= 0, ahead, behind).astype(np.float64)
+        self._costs[changed] = np.where(not_full, rows, np.inf)
+
+    def _assign(self, elevators: List[Elevator], calls: List[int]) -> None:
+        """Update the assignment of hall calls to elevators for the given
+        calls.
+
+        Calls that are still waiting keep their elevator, unless it has become
+        full or another elevator can reach them sooner by more than
+        reassign_margin. Every other call is then assigned greedily, cheapest
+        first, with each assignment adding load_penalty to that elevator's
+        cost for the remaining calls.
+        """
+        if len(calls) == 0:
+            self._assignment = {}
+            return
+        columns = np.array(calls) - 1
+        costs = self._costs[:, columns]
+        load = np.array([elevator.num_passengers() for elevator in elevators],
+                        dtype=np.float64)
+        # The cost of each call for the elevator that can reach it soonest.
+        best = costs.min(axis=0)
+
+        kept = {}
+        for j, floor in enumerate(calls):
+            car = self._assignment.get(floor)
+            if car is not None and costs[car, j] < np.inf and \
+                    costs[car, j] <= best[j] + self.reassign_margin:
+                kept[floor] = car
+                load[car] += 1
+        self._assignment = kept
+
+        unassigned = [j for j, floor in enumerate(calls) if floor not in kept]
+        if len(unassigned) == 0:
+            return
+        remaining = costs[:, unassigned] + \
+            self.load_penalty * load[:, np.newaxis]
+        for _ in range(len(unassigned)):
+            car, j = np.unravel_index(np.argmin(remaining), remaining.shape)
+            if remaining[car, j] == np.inf:
+                # Every remaining call can only be reached by full elevators.
+                break
+            self._assignment[calls[unassigned[j]]] = int(car)
+            remaining[:, j] = np.inf
+            remaining[car] += self.load_penalty
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'extra-imports': ['numpy', 'algorithms', 'entities', 'occupancy'],
+        'max-nested-blocks': 4,
+        'disable': ['R0201'],
+        'max-attributes': 12
+    })
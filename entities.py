@@ -1,151 +1,276 @@
-"""CSC148 Assignment 1 - People and Elevators
-
-=== CSC148 Fall 2018 ===
-Department of Computer Science,
-University of Toronto
-
-=== Module description ===
-This module contains classes for the two "basic" entities in this simulation:
-people and elevators. We have provided basic outlines of these two classes
-for you; you are responsible for implementing these two classes so that they
-work with the rest of the simulation.
-
-You may NOT change any existing attributes, or the interface for any public
-methods we have provided. However, you can (and should) add new attributes,
-and of course you'll have to implement the methods we've provided, as well
-as add your own methods to complete this assignment.
-
-Finally, note that Person and Elevator each inherit from a kind of sprite found
-in sprites.py; this is to enable their instances to be visualized properly.
-You may not change sprites.py, but are responsible for reading the documentation
-to understand these classes, as well as the abstract methods your classes must
-implement.
-"""
-from __future__ import annotations
-from typing import List
-from sprites import PersonSprite, ElevatorSprite
-
-
-class Elevator(ElevatorSprite):
-    """An elevator in the elevator simulation.
-
-    Remember to add additional documentation to this class docstring
-    as you add new attributes (and representation invariants).
-
-    === Attributes ===
-    passengers: A list of the people currently on this elevator
-
-    === Representation invariants ===
-    """
-    passengers: List[Person]
-    current_floor: int
-    max_capacity: int
-
-    def __init__(self, capacity: int) -> None:
-        ElevatorSprite.__init__(self)
-        self.current_floor = 1
-        self.max_capacity = capacity
-        self.passengers = []
-
-    def get_floor(self) -> int:
-        """Returns the current floor of the elevator."""
-        return self.current_floor
-
-    def get_passengers(self) -> List[Person]:
-        """Returns the list of passengers in the elevator."""
-        return self.passengers
-
-    def is_not_full(self) -> bool:
-        """Checks whether the elevator is full."""
-        return len(self.passengers) != self.max_capacity
-
-    def is_empty(self) -> bool:
-        """Checks if the elevator is empty."""
-        return len(self.get_passengers()) == 0
-
-    def add_passenger(self, passenger: Person) -> None:
-        """Adds the person to the list of passengers for the elevator."""
-        self.passengers.append(passenger)
-
-    def fullness(self) -> float:
-        """Return the fraction that this elevator is filled.
-
-        The value returned should be a float between 0.0 (completely empty) and
-        1.0 (completely full).
-        """
-        return len(self.passengers) / self.max_capacity
-
-    def move_up(self) -> None:
-        """Increases the current floor by one."""
-        self.current_floor += 1
-
-    def move_down(self) -> None:
-        """Decreases the current floor by one."""
-        self.current_floor -= 1
-
-
-class Person(PersonSprite):
-    """A person in the elevator simulation.
-
-    === Attributes ===
-    start: the floor this person started on
-    target: the floor this person wants to go to
-    wait_time: the number of rounds this person has been waiting
-
-    === Representation invariants ===
-    start >= 1
-    target >= 1
-    wait_time >= 0
-    """
-    start: int
-    target: int
-    wait_time: int
-
-    def __init__(self, start: int, target: int) -> None:
-        self.wait_time = 0
-        PersonSprite.__init__(self)
-        self.start = start
-        self.target = target
-
-    def get_starting_floor(self) -> int:
-        """Returns the starting floor of the person."""
-        return self.start
-
-    def get_target_floor(self) -> int:
-        """Returns the target floor of the person."""
-        return self.target
-
-    def get_wait_time(self) -> int:
-        """Returns how many rounds this person has waited."""
-        return self.wait_time
-
-    def get_anger_level(self) -> int:
-        """Return this person's anger level.
-
-        A person's anger level is based on how long they have been waiting
-        before reaching their target floor.
-            - Level 0: waiting 0-2 rounds
-            - Level 1: waiting 3-4 rounds
-            - Level 2: waiting 5-6 rounds
-            - Level 3: waiting 7-8 rounds
-            - Level 4: waiting >= 9 rounds
-        """
-        anger_level = [[0, 1, 2], [3, 4], [5, 6], [7, 8]]
-        for index, level in enumerate(anger_level):
-            if self.wait_time in level:
-                return index
-        return 4
-
-    def increase_wait_time(self) -> None:
-        """Increases the number of waited rounds by one."""
-        self.wait_time += 1
-
-
-if __name__ == '__main__':
-    import python_ta
-    python_ta.check_all(config={
-        'extra-imports': ['sprites'],
-        'max-nested-blocks': 4,
-        'disable': ['R0201'],
-        'max-attributes': 12
-    })
+"""CSC148 Assignment 1 - People and Elevators
+
+=== CSC148 Fall 2018 ===
+Department of Computer Science,
+University of Toronto
+
+=== Module description ===
+This module contains classes for the two "basic" entities in this simulation:
+people and elevators. We have provided basic outlines of these two classes
+for you; you are responsible for implementing these two classes so that they
+work with the rest of the simulation.
+
+You may NOT change any existing attributes, or the interface for any public
+methods we have provided. However, you can (and should) add new attributes,
+and of course you'll have to implement the methods we've provided, as well
+as add your own methods to complete this assignment.
+
+Finally, note that Person and Elevator are plain data classes that know nothing
+about Pygame, so a headless simulation never loads an image or allocates a
+surface. Their sprite-backed counterparts live in visual_entities.py, and are
+only used when a simulation is actually being visualized.
+"""
+from __future__ import annotations
+import bisect
+from typing import Dict, List, Optional
+
+
+class Elevator:
+    """An elevator in the elevator simulation.
+
+    Passengers are stored twice: in the passengers list, in boarding order,
+    and bucketed by their target floor, so that finding everyone leaving at a
+    floor doesn't look at anyone else. The target floors are also kept sorted,
+    so the closest one can be found with a binary search.
+
+    === Attributes ===
+    passengers: A list of the people currently on this elevator, in the order
+                they boarded. Use add_passenger and remove_passengers_to to
+                change it, so that the buckets below stay up to date.
+
+    === Private Attributes ===
+    _by_target: the people currently on this elevator, keyed by their
+                target floor, each bucket in the order they boarded
+    _target_floors: the keys of _by_target, in increasing order
+
+    === Representation invariants ===
+    len(passengers) <= max_capacity
+    Every person in passengers is in exactly one bucket of _by_target, the
+    bucket for their target floor, and no bucket in _by_target is empty.
+    _target_floors == sorted(_by_target)
+    """
+    passengers: List[Person]
+    current_floor: int
+    max_capacity: int
+    _by_target: Dict[int, List[Person]]
+    _target_floors: List[int]
+
+    def __init__(self, capacity: int) -> None:
+        self.current_floor = 1
+        self.max_capacity = capacity
+        self.passengers = []
+        self._by_target = {}
+        self._target_floors = []
+
+    def get_floor(self) -> int:
+        """Returns the current floor of the elevator."""
+        return self.current_floor
+
+    def get_passengers(self) -> List[Person]:
+        """Returns the list of passengers in the elevator."""
+        return self.passengers
+
+    def num_passengers(self) -> int:
+        """Returns the number of passengers in the elevator."""
+        return len(self.passengers)
+
+    def first_passenger(self) -> Person:
+        """Returns the passenger who boarded the elevator first.
+
+        Precondition: the elevator is not empty.
+        """
+        return self.passengers[0]
+
+    def get_target_floors(self) -> List[int]:
+        """Returns the target floors of the passengers in the elevator, with
+        no duplicates and in increasing order.
+        """
+        return list(self._target_floors)
+
+    def is_not_full(self) -> bool:
+        """Checks whether the elevator is full."""
+        return len(self.passengers) != self.max_capacity
+
+    def free_capacity(self) -> int:
+        """Returns the number of people that can still board the elevator."""
+        return self.max_capacity - len(self.passengers)
+
+    def is_empty(self) -> bool:
+        """Checks if the elevator is empty."""
+        return len(self.passengers) == 0
+
+    def add_passenger(self, passenger: Person) -> None:
+        """Adds the person to the list of passengers for the elevator."""
+        self.passengers.append(passenger)
+        bucket = self._by_target.get(passenger.target)
+        if bucket is None:
+            self._by_target[passenger.target] = [passenger]
+            bisect.insort(self._target_floors, passenger.target)
+        else:
+            bucket.append(passenger)
+
+    def remove_passengers_to(self, floor: int) -> List[Person]:
+        """Removes and returns the passengers whose target is the given floor,
+        in the order they boarded.
+
+        Nobody is looked at unless someone is leaving.
+        """
+        leaving = self._by_target.pop(floor, [])
+        if len(leaving) > 0:
+            self._target_floors.remove(floor)
+            self.passengers[:] = [person for person in self.passengers
+                                  if person.target != floor]
+        return leaving
+
+    def fullness(self) -> float:
+        """Return the fraction that this elevator is filled.
+
+        The value returned should be a float between 0.0 (completely empty) and
+        1.0 (completely full).
+        """
+        return len(self.passengers) / self.max_capacity
+
+    def move_up(self) -> None:
+        """Increases the current floor by one."""
+        self.current_floor += 1
+
+    def move_down(self) -> None:
+        """Decreases the current floor by one."""
+        self.current_floor -= 1
+
+
+class Clock:
+    """The number of rounds that have passed in a simulation.
+
+    People keep a reference to the clock of the simulation they arrived in,
+    so that their wait time can be worked out from the current round instead
+    of being increased every round.
+
+    === Attributes ===
+    round_num: the number of rounds that have been completed
+
+    === Representation invariants ===
+    round_num >= 0
+    """
+    round_num: int
+
+    def __init__(self) -> None:
+        self.round_num = 0
+
+    def tick(self) -> None:
+        """Completes the current round."""
+        self.round_num += 1
+
+    def advance(self, rounds: int) -> None:
+        """Completes the given number of rounds at once.
+
+        Precondition: rounds >= 0
+        """
+        self.round_num += rounds
+
+
+class Person:
+    """A person in the elevator simulation.
+
+    === Attributes ===
+    start: the floor this person started on
+    target: the floor this person wants to go to
+    wait_time: the number of rounds this person has been waiting
+
+    === Private Attributes ===
+    _clock: the clock of the simulation this person arrived in, or None
+            if they haven't arrived in a simulation yet
+    _arrival_round: the round this person started waiting, measured on _clock
+    _finish_round: the round this person reached their target floor, or None
+                   if they are still waiting
+
+    === Representation invariants ===
+    start >= 1
+    target >= 1
+    wait_time >= 0
+    """
+    start: int
+    target: int
+    _clock: Optional[Clock]
+    _arrival_round: int
+    _finish_round: Optional[int]
+
+    def __init__(self, start: int, target: int) -> None:
+        self._clock = None
+        self._arrival_round = 0
+        self._finish_round = None
+        self.start = start
+        self.target = target
+
+    def _current_round(self) -> int:
+        """Returns the round this person's wait time is measured up to."""
+        if self._finish_round is not None:
+            return self._finish_round
+        if self._clock is None:
+            return 0
+        return self._clock.round_num
+
+    @property
+    def wait_time(self) -> int:
+        """The number of rounds this person has been waiting."""
+        return self._current_round() - self._arrival_round
+
+    @wait_time.setter
+    def wait_time(self, value: int) -> None:
+        self._arrival_round = self._current_round() - value
+
+    def arrive(self, clock: Clock) -> None:
+        """Starts measuring this person's wait time against the given clock.
+
+        Any wait time this person has already accumulated is kept.
+        """
+        wait_time = self.wait_time
+        self._clock = clock
+        self.wait_time = wait_time
+
+    def finish(self) -> None:
+        """Stops this person's wait time from increasing any further."""
+        self._finish_round = self._current_round()
+
+    def get_starting_floor(self) -> int:
+        """Returns the starting floor of the person."""
+        return self.start
+
+    def get_target_floor(self) -> int:
+        """Returns the target floor of the person."""
+        return self.target
+
+    def get_wait_time(self) -> int:
+        """Returns how many rounds this person has waited."""
+        return self.wait_time
+
+    def get_anger_level(self) -> int:
+        """Return this person's anger level.
+
+        A person's anger level is based on how long they have been waiting
+        before reaching their target floor.
+            - Level 0: waiting 0-2 rounds
+            - Level 1: waiting 3-4 rounds
+            - Level 2: waiting 5-6 rounds
+            - Level 3: waiting 7-8 rounds
+            - Level 4: waiting >= 9 rounds
+        """
+        wait_time = self.wait_time
+        anger_level = [[0, 1, 2], [3, 4], [5, 6], [7, 8]]
+        for index, level in enumerate(anger_level):
+            if wait_time in level:
+                return index
+        return 4
+
+    def increase_wait_time(self) -> None:
+        """Increases the number of waited rounds by one."""
+        self._arrival_round -= 1
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'max-nested-blocks': 4,
+        'disable': ['R0201'],
+        'max-attributes': 12
+    })
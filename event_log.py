@@ -0,0 +1,218 @@
+"""CSC148 Assignment 1 - Event Logs
+
+=== CSC148 Fall 2018 ===
+Department of Computer Science,
+University of Toronto
+
+=== Module Description ===
+
+This file contains a compact binary log of everything that happens in each
+round of a simulation, so a fast headless run can be animated afterwards (see
+replay.py), and functions for writing and reading it.
+
+An event log is laid out as follows (all values little-endian):
+    - A header: the magic bytes MAGIC, the format version (uint32), and the
+      number of floors, number of elevators and elevator capacity (uint32).
+    - One record per simulated round, in order. Rounds skipped because the
+      building was idle have no record. Each record is:
+        - the round number, and the number of arrivals, disembarking
+          elevators and boarding elevators (uint32)
+        - each arrival's starting and target floor (int32 pairs), in the
+          order they joined the queue on their floor
+        - each disembarking elevator's index and how many people got off it
+          (int32 pairs)
+        - each boarding elevator's index and how many people boarded it
+          (int32 pairs), in boarding order
+        - the direction each elevator moved (int8, one per elevator)
+
+Who disembarks and who boards is not stored: an elevator lets off everyone
+going to its floor, and people board from the front of their floor's queue,
+so the counts are enough to replay a round exactly.
+"""
+import struct
+from typing import BinaryIO, List, Optional, Tuple
+
+from algorithms import Direction
+from entities import Person
+
+MAGIC = b'ELVEVLOG'
+VERSION = 1
+# Magic bytes, version, number of floors, number of elevators, capacity.
+HEADER = struct.Struct('<8sIIII')
+# Round number, number of arrivals, disembarking and boarding elevators.
+ROUND_HEADER = struct.Struct('<IIII')
+
+
+class RoundEvents:
+    """The events of one round of a simulation.
+
+    === Attributes ===
+    round_num: the round these events happened in
+    arrivals: the starting and target floor of each new arrival
+    disembarks: the index of each elevator people got off, and how many
+    boardings: the index of each elevator people boarded, and how many
+    moves: the direction each elevator moved at the end of the round
+    """
+    round_num: int
+    arrivals: List[Tuple[int, int]]
+    disembarks: List[Tuple[int, int]]
+    boardings: List[Tuple[int, int]]
+    moves: List[Direction]
+
+    def __init__(self, round_num: int) -> None:
+        self.round_num = round_num
+        self.arrivals = []
+        self.disembarks = []
+        self.boardings = []
+        self.moves = []
+
+
+class EventLog:
+    """A simulation's event log, read into memory.
+
+    === Attributes ===
+    num_floors: the number of floors in the simulation
+    num_elevators: the number of elevators in the simulation
+    elevator_capacity: the capacity of each elevator
+    rounds: the events of each simulated round, in order
+    """
+    num_floors: int
+    num_elevators: int
+    elevator_capacity: int
+    rounds: List[RoundEvents]
+
+    def __init__(self, num_floors: int, num_elevators: int,
+                 elevator_capacity: int) -> None:
+        self.num_floors = num_floors
+        self.num_elevators = num_elevators
+        self.elevator_capacity = elevator_capacity
+        self.rounds = []
+
+
+def _pack_pairs(pairs: List[Tuple[int, int]]) -> bytes:
+    """Return the given pairs of integers packed as int32 values."""
+    return struct.pack(f'<{2 * len(pairs)}i',
+                       *(value for pair in pairs for value in pair))
+
+
+class EventLogWriter:
+    """Writes a simulation's events to an event log file as it runs.
+
+    Call start_round at the start of each round, record its events, and call
+    end_round once the elevators have moved.
+
+    === Private Attributes ===
+    _file: the log file being written
+    _num_elevators: the number of elevators in the simulation
+    _round: the events of the current round, or None between rounds
+    """
+    _file: BinaryIO
+    _num_elevators: int
+    _round: Optional[RoundEvents]
+
+    def __init__(self, path: str, num_floors: int, num_elevators: int,
+                 elevator_capacity: int) -> None:
+        """Create an event log at the given path, replacing any file there,
+        for a simulation of the given size.
+        """
+        self._file = open(path, 'wb')
+        self._file.write(HEADER.pack(MAGIC, VERSION, num_floors,
+                                     num_elevators, elevator_capacity))
+        self._num_elevators = num_elevators
+        self._round = None
+
+    def start_round(self, round_num: int) -> None:
+        """Start recording the events of the given round."""
+        self._round = RoundEvents(round_num)
+
+    def arrived(self, people: List[Person]) -> None:
+        """Record that the given people arrived, in the given order."""
+        self._round.arrivals.extend((person.start, person.target)
+                                    for person in people)
+
+    def disembarked(self, elevator_index: int, count: int) -> None:
+        """Record that <count> people got off the elevator with the given
+        index.
+        """
+        self._round.disembarks.append((elevator_index, count))
+
+    def boarded(self, elevator_index: int, count: int) -> None:
+        """Record that <count> people boarded the elevator with the given
+        index.
+        """
+        self._round.boardings.append((elevator_index, count))
+
+    def moved(self, directions: List[Direction]) -> None:
+        """Record the directions the elevators moved in."""
+        self._round.moves = directions
+
+    def end_round(self) -> None:
+        """Write the events of the current round to the log."""
+        events = self._round
+        self._round = None
+        moves = [direction.value for direction in events.moves]
+        moves.extend([0] * (self._num_elevators - len(moves)))
+        self._file.write(b''.join([
+            ROUND_HEADER.pack(events.round_num, len(events.arrivals),
+                              len(events.disembarks), len(events.boardings)),
+            _pack_pairs(events.arrivals),
+            _pack_pairs(events.disembarks),
+            _pack_pairs(events.boardings),
+            struct.pack(f'<{self._num_elevators}b', *moves)
+        ]))
+
+    def close(self) -> None:
+        """Finish writing the log."""
+        self._file.close()
+
+
+def _read_pairs(data: bytes, offset: int,
+                count: int) -> Tuple[List[Tuple[int, int]], int]:
+    """Return <count> pairs of int32 values read from data at the given
+    offset, and the offset just after them.
+    """
+    values = struct.unpack_from(f'<{2 * count}i', data, offset)
+    return list(zip(values[::2], values[1::2])), offset + 8 * count
+
+
+def read_event_log(path: str) -> EventLog:
+    """Return the event log stored in the file at the given path.
+
+    Raise ValueError if the file is not an event log.
+    """
+    with open(path, 'rb') as log_file:
+        data = log_file.read()
+    if len(data) < HEADER.size:
+        raise ValueError(f'{path} is not an event log')
+    magic, version, num_floors, num_elevators, capacity = \
+        HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f'{path} is not an event log')
+
+    log = EventLog(num_floors, num_elevators, capacity)
+    directions = {direction.value: direction for direction in Direction}
+    moves_format = struct.Struct(f'<{num_elevators}b')
+    offset = HEADER.size
+    while offset < len(data):
+        round_num, num_arrivals, num_disembarks, num_boardings = \
+            ROUND_HEADER.unpack_from(data, offset)
+        offset += ROUND_HEADER.size
+        events = RoundEvents(round_num)
+        events.arrivals, offset = _read_pairs(data, offset, num_arrivals)
+        events.disembarks, offset = _read_pairs(data, offset, num_disembarks)
+        events.boardings, offset = _read_pairs(data, offset, num_boardings)
+        events.moves = [directions[value] for value in
+                        moves_format.unpack_from(data, offset)]
+        offset += moves_format.size
+        log.rounds.append(events)
+    return log
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'extra-imports': ['struct', 'algorithms', 'entities'],
+        'max-nested-blocks': 4,
+        'disable': ['R0201'],
+        'max-attributes': 12
+    })
@@ -0,0 +1,181 @@
+"""CSC148 Assignment 1 - Run Instrumentation
+
+=== CSC148 Fall 2018 ===
+Department of Computer Science,
+University of Toronto
+
+=== Module Description ===
+
+This file contains RunProfile, which records how much wall-clock time each
+stage of a simulation run takes and counts what happened in it, and
+TimedVisualizer, which records the time spent in each visualizer call.
+
+Simulations only create a RunProfile when the 'profile' configuration option
+is set, so an unprofiled run pays for nothing but a few "is None" checks per
+round.
+"""
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict
+
+# The counters every profile reports, even if they stay at zero.
+COUNTERS = ['arrivals', 'boardings', 'disembarks', 'moves', 'algorithm_calls']
+
+# By default, the number of most recent times kept for each stage.
+MAX_ROUNDS = 10000
+
+
+class RunProfile:
+    """The time taken by each stage of a simulation run, and counts of the
+    events in it.
+
+    Stage times are measured with time.perf_counter, from the end of the
+    previous stage in the same round. Visualizer calls made during a stage are
+    included in that stage's time, and also recorded separately under
+    'visualizer.' followed by the method name.
+
+    Only the most recent times of each stage are kept, so a long run's
+    profile doesn't grow without limit; the totals, maxima and call counts
+    cover the whole run.
+
+    === Attributes ===
+    totals: the total number of seconds spent in each stage
+    maxima: the most seconds spent in each stage in one call
+    calls: the number of times each stage ran
+    per_round: the number of seconds spent in each stage (or visualizer
+               method) each of the last <max_rounds> times it ran, in
+               order; rounds skipped as idle are not included
+    counters: the number of arrivals, boardings, disembarks, elevator moves
+              and moving algorithm calls
+    max_rounds: the number of most recent times kept in per_round
+
+    === Private Attributes ===
+    _last: the time the previous stage ended
+
+    === Representation invariants ===
+    max_rounds >= 1
+    """
+    totals: Dict[str, float]
+    maxima: Dict[str, float]
+    calls: Dict[str, int]
+    per_round: Dict[str, Deque[float]]
+    counters: Dict[str, int]
+    max_rounds: int
+    _last: float
+
+    def __init__(self, max_rounds: int = MAX_ROUNDS) -> None:
+        self.totals = {}
+        self.maxima = {}
+        self.calls = {}
+        self.per_round = {}
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.max_rounds = max_rounds
+        self._last = time.perf_counter()
+
+    def start_round(self) -> None:
+        """Start timing a new round."""
+        self._last = time.perf_counter()
+
+    def lap(self, stage: str) -> None:
+        """Record that the given stage of the current round has just ended.
+        """
+        now = time.perf_counter()
+        self.add_time(stage, now - self._last)
+        self._last = now
+
+    def add_time(self, name: str, seconds: float) -> None:
+        """Add the given number of seconds to the time spent in <name>."""
+        if name not in self.per_round:
+            self.totals[name] = 0.0
+            self.maxima[name] = seconds
+            self.calls[name] = 0
+            self.per_round[name] = deque(maxlen=self.max_rounds)
+        self.totals[name] += seconds
+        self.maxima[name] = max(self.maxima[name], seconds)
+        self.calls[name] += 1
+        self.per_round[name].append(seconds)
+
+    def count(self, counter: str, amount: int = 1) -> None:
+        """Add <amount> to the given counter."""
+        self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def report(self) -> Dict[str, Any]:
+        """Return a summary of this profile: for each stage, the number of
+        times it ran, its total, mean and maximum time in seconds, and its
+        time each of the last max_rounds times it ran (under 'per_round'),
+        and the counters.
+        """
+        stages = {}
+        for name, times in self.per_round.items():
+            stages[name] = {
+                'total': self.totals[name],
+                'mean': self.totals[name] / self.calls[name],
+                'max': self.maxima[name],
+                'calls': self.calls[name],
+                'per_round': list(times)
+            }
+        return {'stages': stages, 'counters': dict(self.counters)}
+
+
+class TimedVisualizer:
+    """A wrapper around a visualizer that records the time spent in each of
+    its methods in a RunProfile.
+
+    === Private Attributes ===
+    _visualizer: the wrapped visualizer
+    _profile: the profile the times are recorded in
+    """
+    _visualizer: Any
+    _profile: RunProfile
+
+    def __init__(self, visualizer: Any, profile: RunProfile) -> None:
+        self._visualizer = visualizer
+        self._profile = profile
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith('_'):
+            # Private attributes are never delegated, which also stops
+            # unpickling from recursing before _visualizer is restored.
+            raise AttributeError(name)
+        attribute = getattr(self._visualizer, name)
+        if not callable(attribute):
+            return attribute
+        # Keep the timed method, so later calls don't come through here.
+        timed = self._timed(name, attribute)
+        setattr(self, name, timed)
+        return timed
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Return the state of this wrapper for pickling, without the timed
+        methods it has kept.
+        """
+        return {'_visualizer': self._visualizer, '_profile': self._profile}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Restore this wrapper from its pickled state."""
+        self.__dict__.update(state)
+
+    def _timed(self, name: str, method: Callable) -> Callable:
+        """Return a function that calls the given method and records how long
+        it took.
+        """
+        profile = self._profile
+        label = 'visualizer.' + name
+
+        def call(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                profile.add_time(label, time.perf_counter() - start)
+        return call
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'extra-imports': ['time', 'collections'],
+        'max-nested-blocks': 4,
+        'disable': ['R0201'],
+        'max-attributes': 12
+    })
@@ -0,0 +1,174 @@
+"""CSC148 Assignment 1 - Floor Occupancy
+
+=== CSC148 Fall 2018 ===
+Department of Computer Science,
+University of Toronto
+
+=== Module Description ===
+
+This file contains FloorIndex, a sorted set of floor numbers that answers
+"which floor in the set is closest to this one?" with a binary search, and
+WaitingQueues, the dictionary of waiting queues used by Simulation, which keeps
+a FloorIndex of the floors that have people waiting.
+
+Moving algorithms use these indexes to find the lowest or nearest waiting floor,
+the nearest passenger target, or whether anyone is waiting at all, without
+scanning every floor of the building.
+"""
+import bisect
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from entities import Person
+
+
+class FloorIndex:
+    """A sorted set of floor numbers.
+
+    === Private Attributes ===
+    _floors: the floors in this index, in increasing order, with no
+             duplicates
+    """
+    _floors: List[int]
+
+    def __init__(self, floors: Iterable[int] = ()) -> None:
+        """Initialize a new index containing the given floors."""
+        self._floors = sorted(set(floors))
+
+    def __len__(self) -> int:
+        return len(self._floors)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._floors)
+
+    def __contains__(self, floor: int) -> bool:
+        i = bisect.bisect_left(self._floors, floor)
+        return i < len(self._floors) and self._floors[i] == floor
+
+    def add(self, floor: int) -> None:
+        """Add the given floor to this index, if it isn't already in it."""
+        i = bisect.bisect_left(self._floors, floor)
+        if i == len(self._floors) or self._floors[i] != floor:
+            self._floors.insert(i, floor)
+
+    def discard(self, floor: int) -> None:
+        """Remove the given floor from this index, if it is in it."""
+        i = bisect.bisect_left(self._floors, floor)
+        if i < len(self._floors) and self._floors[i] == floor:
+            del self._floors[i]
+
+    def lowest(self) -> Optional[int]:
+        """Return the lowest floor in this index, or None if it is empty."""
+        return self._floors[0] if len(self._floors) > 0 else None
+
+    def highest(self) -> Optional[int]:
+        """Return the highest floor in this index, or None if it is empty."""
+        return self._floors[-1] if len(self._floors) > 0 else None
+
+    def closest(self, floor: int) -> Optional[int]:
+        """Return the floor in this index closest to the given floor, or None
+        if this index is empty.
+
+        If two floors are equally close, the lower one is returned.
+        """
+        return closest_floor(self._floors, floor)
+
+
+def closest_floor(floors: List[int], floor: int) -> Optional[int]:
+    """Return the floor in <floors> closest to the given floor, or None if
+    <floors> is empty.
+
+    If two floors are equally close, the lower one is returned.
+
+    Precondition: floors is sorted in increasing order.
+
+    >>> closest_floor([2, 6], 4)
+    2
+    >>> closest_floor([2, 6], 5)
+    6
+    >>> closest_floor([], 3) is None
+    True
+    """
+    i = bisect.bisect_left(floors, floor)
+    if i == len(floors):
+        return floors[-1] if i > 0 else None
+    above = floors[i]
+    if i == 0 or above == floor:
+        return above
+    below = floors[i - 1]
+    if floor - below <= above - floor:
+        return below
+    return above
+
+
+class WaitingQueues(dict):
+    """The people waiting on each floor of a building, in the order they
+    arrived, together with an index of the floors that have anyone waiting.
+
+    Code that adds or removes waiting people must keep the index up to date,
+    by using add_arrivals and board, or by calling refresh for the floor
+    afterwards.
+
+    === Attributes ===
+    occupied: the floors that have at least one person waiting
+
+    === Representation invariants ===
+    A floor is in occupied if and only if its queue is not empty.
+    """
+    occupied: FloorIndex
+
+    def __init__(self, num_floors: int) -> None:
+        """Initialize empty queues for floors 1 to num_floors."""
+        dict.__init__(self, ((floor, deque())
+                             for floor in range(1, num_floors + 1)))
+        self.occupied = FloorIndex()
+
+    def add_arrivals(self, floor: int, people: List[Person]) -> None:
+        """Add the given people to the back of the given floor's queue."""
+        self[floor].extend(people)
+        self.refresh(floor)
+
+    def board(self, floor: int) -> Person:
+        """Remove and return the person at the front of the given floor's
+        queue.
+
+        Precondition: someone is waiting on the given floor.
+        """
+        queue = self[floor]
+        person = queue.popleft()
+        if len(queue) == 0:
+            self.occupied.discard(floor)
+        return person
+
+    def refresh(self, floor: int) -> None:
+        """Update the index after the given floor's queue has been changed
+        directly.
+        """
+        if len(self[floor]) > 0:
+            self.occupied.add(floor)
+        else:
+            self.occupied.discard(floor)
+
+
+def waiting_floors(waiting: Dict[int, Iterable[Person]]) -> FloorIndex:
+    """Return an index of the floors in <waiting> that have anyone waiting.
+
+    If <waiting> keeps its own index in an occupied attribute, as
+    WaitingQueues does, that index is returned and must not be changed;
+    for any other dictionary a new index is built.
+    """
+    occupied = getattr(waiting, 'occupied', None)
+    if occupied is not None:
+        return occupied
+    return FloorIndex(floor for floor, people in waiting.items()
+                      if len(people) > 0)
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'extra-imports': ['bisect', 'collections', 'entities'],
+        'max-nested-blocks': 4,
+        'disable': ['R0201'],
+        'max-attributes': 12
+    })
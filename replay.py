@@ -0,0 +1,215 @@
+"""CSC148 Assignment 1 - Event Log Replay
+
+=== CSC148 Fall 2018 ===
+Department of Computer Science,
+University of Toronto
+
+=== Module Description ===
+
+This file contains Replay, which replays the event log of a simulation run
+(see event_log.py) with the Visualizer, so a simulation can be run at full
+speed headless and only the interesting stretch of it watched afterwards.
+
+A replay can seek to any round, without animating the rounds in between, and
+animate at any speed. It rebuilds the simulation's elevators and people from
+the log alone, so it doesn't need the arrival generator or moving algorithm
+the simulation was run with.
+
+Run this file to replay a log from the command line, for example:
+    python replay.py events.log --start 500 --end 600 --speed 4
+"""
+from __future__ import annotations
+import argparse
+from typing import List, Optional, Union, TYPE_CHECKING
+
+from algorithms import Direction
+from entities import Clock, Elevator, Person
+from event_log import EventLog, RoundEvents, read_event_log
+from occupancy import WaitingQueues
+from simulation import NullVisualizer
+# Pygame is only imported when a replay is animated.
+if TYPE_CHECKING:
+    from visualizer import Visualizer
+
+
+class Replay:
+    """A replay of a simulation's event log.
+
+    The replay's state is the state of the simulation at the start of round
+    round_num.
+
+    === Attributes ===
+    log: the event log being replayed
+    elevators: the elevators in the replayed simulation
+    waiting: the people waiting on each floor, in the order they arrived
+    num_completed: the number of people who have reached their target floor
+    visualizer: the visualizer the replay is animated with
+    speed: how many times faster than a visualized simulation the replay is
+           animated
+
+    === Private Attributes ===
+    _visualize: whether the replay is animated
+    _clock: the replayed simulation's clock
+    _next: the index in log.rounds of the next round to replay
+
+    === Representation invariants ===
+    speed > 0
+    """
+    log: EventLog
+    elevators: List[Elevator]
+    waiting: WaitingQueues
+    num_completed: int
+    visualizer: Union[Visualizer, NullVisualizer]
+    speed: float
+    _visualize: bool
+    _clock: Clock
+    _next: int
+
+    def __init__(self, log: EventLog, visualize: bool = True,
+                 speed: float = 1.0) -> None:
+        """Initialize a replay of the given log, at its first round."""
+        self.log = log
+        self.speed = speed
+        self._visualize = visualize
+        self._reset()
+
+    @property
+    def round_num(self) -> int:
+        """The round this replay is at the start of."""
+        return self._clock.round_num
+
+    def _reset(self) -> None:
+        """Go back to the start of the replayed simulation."""
+        if self._visualize:
+            from visual_entities import VisualElevator
+            elevator_type = VisualElevator
+        else:
+            elevator_type = Elevator
+        self.elevators = [elevator_type(self.log.elevator_capacity)
+                          for _ in range(self.log.num_elevators)]
+        self.waiting = WaitingQueues(self.log.num_floors)
+        self.num_completed = 0
+        self._clock = Clock()
+        self._next = 0
+        if self._visualize:
+            from visualizer import Visualizer
+            self.visualizer = Visualizer(self.elevators, self.log.num_floors,
+                                         True, self.speed)
+        else:
+            self.visualizer = NullVisualizer()
+
+    def seek(self, round_num: int) -> None:
+        """Jump to the start of the given round, without animating the rounds
+        in between.
+        """
+        if round_num < self.round_num:
+            self._reset()
+        visualizer = self.visualizer
+        self.visualizer = NullVisualizer()
+        try:
+            while self._next < len(self.log.rounds) and \
+                    self.log.rounds[self._next].round_num < round_num:
+                self._play_round(self.log.rounds[self._next])
+                self._next += 1
+        finally:
+            self.visualizer = visualizer
+        if round_num > self.round_num:
+            self._clock.advance(round_num - self.round_num)
+        self.visualizer.show_state(self.elevators, self.waiting)
+        self.visualizer.render_header(self.round_num)
+
+    def play(self, end_round: Optional[int] = None) -> None:
+        """Animate every round from the current one up to, but not including,
+        <end_round>, or to the end of the log if end_round is None.
+        """
+        while self._next < len(self.log.rounds):
+            events = self.log.rounds[self._next]
+            if end_round is not None and events.round_num >= end_round:
+                break
+            self.visualizer.render_header(events.round_num)
+            self._play_round(events)
+            self._next += 1
+            self.visualizer.wait(1)
+        if end_round is not None and end_round > self.round_num:
+            self._clock.advance(end_round - self.round_num)
+
+    def _play_round(self, events: RoundEvents) -> None:
+        """Replay the given round's events, in the same stages as the
+        simulation.
+
+        Raise ValueError if the events don't match the replayed state.
+        """
+        if events.round_num > self.round_num:
+            # The simulation skipped idle rounds.
+            self._clock.advance(events.round_num - self.round_num)
+
+        for start, target in events.arrivals:
+            person = self._new_person(start, target)
+            person.arrive(self._clock)
+            self.waiting.add_arrivals(start, [person])
+        self.visualizer.show_arrivals(self.waiting)
+
+        disembarked = []
+        for index, count in events.disembarks:
+            elevator = self.elevators[index]
+            leaving = elevator.remove_passengers_to(elevator.get_floor())
+            if len(leaving) != count:
+                raise ValueError(f'round {events.round_num}: expected '
+                                 f'{count} people to leave elevator {index}')
+            for person in leaving:
+                person.finish()
+                disembarked.append((person, elevator))
+            self.num_completed += count
+        self.visualizer.show_disembarkings(disembarked)
+
+        boarded = []
+        for index, count in events.boardings:
+            elevator = self.elevators[index]
+            floor = elevator.get_floor()
+            if len(self.waiting[floor]) < count or \
+                    elevator.free_capacity() < count:
+                raise ValueError(f'round {events.round_num}: {count} people '
+                                 f'cannot board elevator {index}')
+            for _ in range(count):
+                person = self.waiting.board(floor)
+                elevator.add_passenger(person)
+                boarded.append((person, elevator))
+        self.visualizer.show_boardings(boarded)
+
+        for elevator, direction in zip(self.elevators, events.moves):
+            if direction == Direction.DOWN:
+                elevator.move_down()
+            elif direction == Direction.UP:
+                elevator.move_up()
+        self.visualizer.show_elevator_moves(self.elevators, events.moves)
+        self._clock.tick()
+
+    def _new_person(self, start: int, target: int) -> Person:
+        """Return a new person for this replay."""
+        if self._visualize:
+            from visual_entities import VisualPerson
+            return VisualPerson(start, target)
+        return Person(start, target)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Replay the event log described by the given command line arguments.
+    """
+    parser = argparse.ArgumentParser(
+        description='Replay an elevator simulation event log.')
+    parser.add_argument('log', help='event log written by a simulation')
+    parser.add_argument('--start', type=int, default=0,
+                        help='round to start animating at')
+    parser.add_argument('--end', type=int, default=None,
+                        help='round to stop before (default: end of the log)')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='how many times faster than real time to play')
+    args = parser.parse_args(argv)
+
+    replay = Replay(read_event_log(args.log), True, args.speed)
+    replay.seek(args.start)
+    replay.play(args.end)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""CSC148 Assignment 1 - Replications
+
+=== CSC148 Fall 2018 ===
+Department of Computer Science,
+University of Toronto
+
+=== Module Description ===
+
+This file contains functions for running many independent, seeded
+replications of the same simulation configuration across a pool of worker
+processes, and for summarizing their statistics with means and confidence
+intervals.
+
+Each replication deep-copies the configuration (so arrival generators and
+moving algorithms never share state between replications) and seeds the random
+module (and the arrival generator, if it has its own random number generator)
+with its own seed before building the simulation, so the result of a
+replication depends only on its configuration and seed, not on which process
+ran it or what ran before it.
+
+The configuration must be picklable to be sent to the worker processes, and
+is never visualized.
+"""
+import copy
+import math
+import random
+import statistics
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+
+from simulation import Simulation
+
+# Two-sided 95% critical values of Student's t distribution, indexed by
+# degrees of freedom. Larger samples use the normal approximation.
+_T_95 = [
+    float('nan'), 12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306,
+    2.262, 2.228, 2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101,
+    2.093, 2.086, 2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048,
+    2.045, 2.042
+]
+_Z_95 = 1.960
+
+
+def run_replication(config: Dict[str, Any], num_rounds: int,
+                    seed: int) -> Dict[str, int]:
+    """Run one replication of the given configuration with the given seed,
+    and return its statistics.
+
+    The given configuration is not changed.
+    """
+    config = copy.deepcopy(config)
+    config['visualize'] = False
+    random.seed(seed)
+    config['arrival_generator'].reseed(seed)
+    return Simulation(config).run(num_rounds)
+
+
+def _run_seeded(args: List[Any]) -> Dict[str, int]:
+    """Unpack the arguments for run_replication in a worker process."""
+    return run_replication(*args)
+
+
+def _run_tasks(tasks: List[List[Any]],
+               processes: Optional[int]) -> List[Dict[str, int]]:
+    """Run each task's replication, in worker processes unless processes is
+    1, and return their statistics in the same order as the tasks.
+    """
+    if processes == 1:
+        return [_run_seeded(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        return list(executor.map(_run_seeded, tasks))
+
+
+def run_replications(config: Dict[str, Any], num_rounds: int,
+                     seeds: Iterable[int],
+                     processes: Optional[int] = None) -> List[Dict[str, int]]:
+    """Run one replication of the given configuration for each seed, and
+    return their statistics in the same order as the seeds.
+
+    Replications are spread over <processes> worker processes (by default,
+    one per CPU). If processes is 1, they are run in this process instead.
+    """
+    return _run_tasks([[config, num_rounds, seed] for seed in seeds],
+                      processes)
+
+
+def summarize(results: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    """Return the mean and 95% confidence interval of each numeric
+    statistic across the given replication results.
+
+    Each statistic maps to a dictionary with the keys 'mean', 'stdev',
+    'ci_low' and 'ci_high'. The standard deviation and interval are 0 for a
+    single replication. Statistics that aren't numbers, such as a run's
+    profile, are left out.
+
+    Precondition: len(results) >= 1, and every result has the same keys.
+    """
+    summary = {}
+    for key, value in results[0].items():
+        if not isinstance(value, (int, float)):
+            continue
+        values = [result[key] for result in results]
+        mean = statistics.fmean(values)
+        if len(values) < 2:
+            stdev = 0.0
+            half_width = 0.0
+        else:
+            stdev = statistics.stdev(values)
+            df = len(values) - 1
+            critical = _T_95[df] if df < len(_T_95) else _Z_95
+            half_width = critical * stdev / math.sqrt(len(values))
+        summary[key] = {
+            'mean': mean,
+            'stdev': stdev,
+            'ci_low': mean - half_width,
+            'ci_high': mean + half_width
+        }
+    return summary
+
+
+def compare(configs: Dict[str, Dict[str, Any]], num_rounds: int,
+            seeds: Iterable[int],
+            processes: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+    """Run replications of each named configuration with the same seeds,
+    and return the summary of each one by name.
+
+    Using the same seeds for every configuration gives each of them the same
+    sequence of random numbers (common random numbers), which makes the
+    differences between them easier to detect.
+    """
+    seeds = list(seeds)
+    names = list(configs)
+    tasks = [[configs[name], num_rounds, seed]
+             for name in names for seed in seeds]
+    results = _run_tasks(tasks, processes)
+
+    summaries = {}
+    for i, name in enumerate(names):
+        summaries[name] = summarize(
+            results[i * len(seeds):(i + 1) * len(seeds)])
+    return summaries
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'extra-imports': ['copy', 'math', 'random', 'statistics',
+                          'concurrent.futures', 'simulation'],
+        'max-nested-blocks': 4,
+        'disable': ['R0201'],
+        'max-attributes': 12
+    })
@@ -16,12 +16,22 @@ remove any of the existing attributes.
 """
 # You may import more things from these modules (e.g., additional types from
 # typing), but you may not import from any other modules.
-from typing import Dict, List, Any
+from __future__ import annotations
+import random
+from typing import Dict, List, Any, Optional, Tuple, Union, TYPE_CHECKING
 
 import algorithms
 from algorithms import Direction
-from entities import Person, Elevator
-from visualizer import Visualizer
+import checkpoint
+from entities import Clock, Person, Elevator
+from event_log import EventLogWriter
+from instrumentation import RunProfile, TimedVisualizer
+from occupancy import WaitingQueues
+from trip_statistics import TripStatistics
+# Pygame is slow to import, and may not be installed where simulations are run
+# headless, so the modules that use it are only imported to visualize.
+if TYPE_CHECKING:
+    from visualizer import Visualizer
 
 
 class Simulation:
@@ -32,46 +42,101 @@ class Simulation:
     elevators: a list of the elevators in the simulation
     moving_algorithm: the algorithm used to decide how to move elevators
     num_floors: the number of floors
-    visualizer: the Pygame visualizer used to visualize this simulation
+    trip_stats: the trip times of the people who reached their target floor
+    visualizer: the Pygame visualizer used to visualize this simulation, or
+                a visualizer that does nothing if it isn't visualized
     waiting: a dictionary of people waiting for an elevator
-             (keys are floor numbers, values are the list of waiting people)
+             (keys are floor numbers, values are the queue of waiting people,
+             in the order they arrived), which also keeps track of the
+             floors that have anyone waiting
+
+    === Private Attributes ===
+    _clock: the number of completed rounds, which everyone in the simulation
+            measures their wait time against
+    _skip_idle: whether rounds in which nothing can happen are skipped
+    _checkpoint_path: the file checkpoints are written to, or None if this
+                      simulation doesn't write checkpoints while it runs
+    _checkpoint_every: the number of rounds between checkpoints
+    _checkpoint_writer: the writer used for checkpoints during the current
+                        run, or None outside of a run
+    _profile: the stage times and counters of this simulation's runs, or None
+              if this simulation isn't being profiled
+    _event_log_path: the file runs write their event log to, or None if they
+                     don't write one
+    _event_log: the writer of the current run's event log, or None if it
+                isn't writing one
     """
     arrival_generator: algorithms.ArrivalGenerator
     num_of_arrivals: int
     elevators: List[Elevator]
     moving_algorithm: algorithms.MovingAlgorithm
-    people_completed: List[Person]
+    trip_stats: TripStatistics
     num_floors: int
-    visualizer: Visualizer
-    waiting: Dict[int, List[Person]]
+    visualizer: Union[Visualizer, NullVisualizer]
+    waiting: WaitingQueues
+    _clock: Clock
+    _skip_idle: bool
+    _checkpoint_path: Optional[str]
+    _checkpoint_every: int
+    _checkpoint_writer: Optional[checkpoint.CheckpointWriter]
+    _profile: Optional[RunProfile]
+    _event_log_path: Optional[str]
+    _event_log: Optional[EventLogWriter]
 
     def __init__(self,
                  config: Dict[str, Any]) -> None:
         """Initialize a new simulation using the given configuration."""
+        # Sprites are only needed when there is something to draw them on.
+        if config['visualize']:
+            from visual_entities import VisualPerson, VisualElevator
+            elevator_type = VisualElevator
+            person_type = VisualPerson
+        else:
+            elevator_type = Elevator
+            person_type = Person
+
         self.elevators = []
         for _ in range(config["num_elevators"]):
-            self.elevators.append(Elevator(config["elevator_capacity"]))
+            self.elevators.append(elevator_type(config["elevator_capacity"]))
 
-        self.waiting = {}
         self.num_floors = config["num_floors"]
         self.generate_waiting()
 
+        self._clock = Clock()
+
         self.arrival_generator = config["arrival_generator"]
+        self.arrival_generator.person_type = person_type
         self.num_of_arrivals = 0
-        self.people_completed = []
+        self.trip_stats = TripStatistics()
 
         self.moving_algorithm = config["moving_algorithm"]
+        # Rounds can only be skipped when they don't need to be drawn.
+        self._skip_idle = (config.get('skip_idle', False) and
+                           not config['visualize'] and
+                           self.moving_algorithm.idle_when_quiescent)
+        self._checkpoint_path = config.get('checkpoint_path')
+        self._checkpoint_every = config.get('checkpoint_every', 0)
+        self._checkpoint_writer = None
         # Initialize the visualizer.
         # Note that this should be called *after* the other attributes
         # have been initialized.
-        self.visualizer = Visualizer(self.elevators,
-                                     self.num_floors,
-                                     config['visualize'])
+        if config['visualize']:
+            from visualizer import Visualizer
+            self.visualizer = Visualizer(self.elevators,
+                                         self.num_floors,
+                                         True)
+        else:
+            self.visualizer = NullVisualizer()
+        self._profile = None
+        if config.get('profile', False):
+            self._profile = RunProfile()
+            self.visualizer = TimedVisualizer(self.visualizer, self._profile)
+        self._event_log_path = config.get('event_log')
+        self._event_log = None
 
     def generate_waiting(self) -> None:
-        """Generates self.waiting keys with empty lists for values."""
-        for i in range(1, self.num_floors + 1):
-            self.waiting[i] = []
+        """Generates self.waiting keys with empty queues for values."""
+        self.waiting = WaitingQueues(self.num_floors)
 
     ############################################################################
     # Handle rounds of simulation.
@@ -86,61 +151,200 @@ class Simulation:
 
         Note: each run of the simulation starts from the same initial state
         (no people, all elevators are empty and start at floor 1).
+
+        If the configuration sets the optional 'skip_idle' key to True, and
+        the simulation isn't visualized, stretches of rounds in which the
+        building is empty are skipped instead of simulated one at a time.
+        The statistics are exactly the same either way.
+
+        If the configuration sets the optional 'checkpoint_path' and
+        'checkpoint_every' keys, a checkpoint is written to that path every
+        <checkpoint_every> rounds, and at the end of the run, without
+        pausing the run to compress or write it.
+
+        If the configuration sets the optional 'profile' key to True, the
+        statistics also include a 'profile' key, with the wall-clock time
+        spent in each stage in total and in each of the most recent rounds
+        (see instrumentation.RunProfile), and counts of the arrivals,
+        boardings, disembarks, elevator moves and moving algorithm calls.
+
+        If the configuration sets the optional 'event_log' key to a path, the
+        events of every round are written to an event log there, which
+        replay.py can animate afterwards at any speed.
+
+        The arrival generator is closed when the run finishes, releasing any
+        file it is reading from.
         """
-        for i in range(num_rounds):
+        if self._event_log_path is not None:
+            capacity = 0
+            if len(self.elevators) > 0:
+                capacity = self.elevators[0].max_capacity
+            self._event_log = EventLogWriter(self._event_log_path,
+                                             self.num_floors,
+                                             len(self.elevators), capacity)
+        return self._run_rounds(0, num_rounds)
+
+    def resume(self, num_rounds: int) -> Dict[str, Any]:
+        """Continue running this simulation, usually one loaded from a
+        checkpoint, until <num_rounds> rounds have been completed in total.
+
+        Return the statistics for the whole run, exactly as run would have
+        returned them had the simulation never been interrupted.
+
+        No event log is written for the resumed rounds.
+        """
+        return self._run_rounds(self._clock.round_num, num_rounds)
+
+    def _run_rounds(self, first_round: int, num_rounds: int) -> Dict[str, Any]:
+        """Run the simulation from <first_round> until <num_rounds> rounds
+        have been completed, and return the statistics for the whole run.
+        """
+        if self._checkpoint_path is not None and self._checkpoint_every > 0:
+            self._checkpoint_writer = checkpoint.CheckpointWriter()
+        next_checkpoint = first_round + self._checkpoint_every
+
+        profile = self._profile
+        event_log = self._event_log
+        i = first_round
+        while i < num_rounds:
+            if profile is not None:
+                profile.start_round()
+            if event_log is not None:
+                event_log.start_round(i)
             self.visualizer.render_header(i)
 
             # Stage 1: generate new arrivals
             self._generate_arrivals(i)
+            if profile is not None:
+                profile.lap('arrivals')
 
             # Stage 2: leave elevators
             self._handle_leaving()
+            if profile is not None:
+                profile.lap('leaving')
 
             # Stage 3: board elevators
             self._handle_boarding()
+            if profile is not None:
+                profile.lap('boarding')
 
             # Stage 4: move the elevators using the moving algorithm
             self._move_elevators()
+            if profile is not None:
+                profile.lap('moving')
+            if event_log is not None:
+                event_log.end_round()
 
             # Stage 5: handle people wait time
             self._handle_wait_time()
 
             # Pause for 1 second
             self.visualizer.wait(1)
-
+            if profile is not None:
+                profile.lap('wait')
+
+            i = self._next_round(i + 1, num_rounds)
+            if self._checkpoint_writer is not None and \
+                    (i >= next_checkpoint or i >= num_rounds):
+                self._checkpoint_writer.submit(self._checkpoint_path,
+                                               self._checkpoint_state())
+                next_checkpoint = i + self._checkpoint_every
+
+        if self._checkpoint_writer is not None:
+            writer = self._checkpoint_writer
+            self._checkpoint_writer = None
+            writer.close()
+        if event_log is not None:
+            self._event_log = None
+            event_log.close()
+        self.arrival_generator.close()
         return self._calculate_stats(num_rounds)
 
+    def _next_round(self, round_num: int, num_rounds: int) -> int:
+        """Return the next round to simulate, given that the given round is
+        next in line.
+
+        When skipping idle rounds, if nobody is waiting, every elevator is
+        empty and the moving algorithm leaves idle elevators alone, nothing
+        can happen until the next arrival, so the clock jumps straight to
+        that round (or to the end of the run). Everyone's wait time still
+        counts the skipped rounds.
+        """
+        if not self._skip_idle or len(self.waiting.occupied) > 0:
+            return round_num
+        for elevator in self.elevators:
+            if not elevator.is_empty():
+                return round_num
+        next_arrival = self.arrival_generator.next_arrival_round(round_num)
+        if next_arrival is None or next_arrival > num_rounds:
+            next_arrival = num_rounds
+        if next_arrival > round_num:
+            self._clock.advance(next_arrival - round_num)
+        return max(next_arrival, round_num)
+
     def _generate_arrivals(self, round_num: int) -> None:
         """Generate and visualize new arrivals."""
 
         new_arrivals = self.arrival_generator.generate(round_num)
         for key in new_arrivals:
+            for person in new_arrivals[key]:
+                person.arrive(self._clock)
             self.num_of_arrivals += len(new_arrivals[key])
-            self.waiting[key].extend(new_arrivals[key])
+            self.waiting.add_arrivals(key, new_arrivals[key])
+            if self._profile is not None:
+                self._profile.count('arrivals', len(new_arrivals[key]))
+            if self._event_log is not None:
+                self._event_log.arrived(new_arrivals[key])
         self.visualizer.show_arrivals(self.waiting)
 
     def _handle_leaving(self) -> None:
-        """Handle people leaving elevators."""
-        for elevator in self.elevators:
-            leaving_list = elevator.passengers[:]
-            for person in leaving_list:
-                if person.target == elevator.get_floor():
-                    elevator.get_passengers().remove(person)
-                    self.visualizer.show_disembarking(person, elevator)
-                    self.people_completed.append(person)
+        """Handle people leaving elevators.
+
+        Everyone leaving is shown leaving at the same time.
+        """
+        disembarked = []
+        for i, elevator in enumerate(self.elevators):
+            leaving = elevator.remove_passengers_to(elevator.get_floor())
+            for person in leaving:
+                person.finish()
+                disembarked.append((person, elevator))
+                self.trip_stats.record(person.get_wait_time())
+                if self._profile is not None:
+                    self._profile.count('disembarks')
+            if self._event_log is not None and len(leaving) > 0:
+                self._event_log.disembarked(i, len(leaving))
+        self.visualizer.show_disembarkings(disembarked)
 
     def _handle_boarding(self) -> None:
-        """Handle boarding of people and visualize."""
-        for key in self.waiting:
-            people_copy = self.waiting[key][:]
-            for person in people_copy:
-                for elevator in self.elevators:
-                    if person.get_starting_floor() == elevator.get_floor() \
-                            and elevator.is_not_full():
-                        elevator.add_passenger(person)
-                        self.visualizer.show_boarding(person, elevator)
-                        self.waiting[key].remove(person)
-                        break
+        """Handle boarding of people and visualize.
+
+        People on each floor board in the order they arrived, filling the
+        elevators on that floor in order. Only floors that currently have an
+        elevator with free space are visited. Everyone boarding is shown
+        boarding at the same time.
+        """
+        boarded = []
+        open_elevators = {}
+        for i, elevator in enumerate(self.elevators):
+            if elevator.is_not_full():
+                open_elevators.setdefault(elevator.get_floor(), []).append(i)
+
+        for floor in sorted(open_elevators):
+            queue = self.waiting[floor]
+            for i in open_elevators[floor]:
+                if len(queue) == 0:
+                    break
+                elevator = self.elevators[i]
+                num_boarding = min(elevator.free_capacity(), len(queue))
+                for _ in range(num_boarding):
+                    person = self.waiting.board(floor)
+                    elevator.add_passenger(person)
+                    boarded.append((person, elevator))
+                if self._profile is not None:
+                    self._profile.count('boardings', num_boarding)
+                if self._event_log is not None:
+                    self._event_log.boarded(i, num_boarding)
+        self.visualizer.show_boardings(boarded)
 
     def _move_elevators(self) -> None:
         """Move the elevators in this simulation.
@@ -150,6 +354,12 @@ class Simulation:
         directions = self.moving_algorithm.move_elevators(self.elevators,
                                                           self.waiting,
                                                           self.num_floors)
+        if self._event_log is not None:
+            self._event_log.moved(directions)
+        if self._profile is not None:
+            self._profile.count('algorithm_calls')
+            self._profile.count('moves', sum(direction != Direction.STAY
+                                             for direction in directions))
         if len(directions) == 0:
             return None
 
@@ -163,28 +373,74 @@ class Simulation:
 
     def _handle_wait_time(self) -> None:
         """Increases wait_time of people waiting and
-         passengers in all elevators"""
-        for key in self.waiting:
-            for person in self.waiting[key]:
-                person.increase_wait_time()
-        for elevator in self.elevators:
-            for passenger in elevator.get_passengers():
-                passenger.increase_wait_time()
+         passengers in all elevators.
+
+        Everyone in the simulation measures their wait time against the
+        simulation's clock, so this only needs to advance the clock.
+        """
+        self._clock.tick()
+
+    ############################################################################
+    # Checkpoints
+    ############################################################################
+    def save_checkpoint(self, path: str) -> None:
+        """Write this simulation's complete state, and the state of the random
+        module, to a checkpoint file at the given path.
+
+        Precondition: this simulation is not being visualized, and is not
+        currently running.
+        """
+        checkpoint.write_checkpoint(path, self._checkpoint_state())
+
+    @staticmethod
+    def load_checkpoint(path: str) -> 'Simulation':
+        """Return the simulation saved in the checkpoint file at the given
+        path, and restore the random module to its state when it was saved.
+
+        Call resume on the returned simulation to continue running it.
+        """
+        simulation, random_state = checkpoint.read_checkpoint(path)
+        random.setstate(random_state)
+        return simulation
+
+    def _checkpoint_state(self) -> bytes:
+        """Return this simulation and the state of the random module,
+        pickled.
+        """
+        return checkpoint.dumps((self, random.getstate()))
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Return the state of this simulation for pickling, without the
+        checkpoint writer or event log of the current run.
+        """
+        state = self.__dict__.copy()
+        state['_checkpoint_writer'] = None
+        state['_event_log'] = None
+        return state
 
     ############################################################################
     # Statistics calculations
     ############################################################################
-    def _calculate_stats(self, num_rounds: int) -> Dict[str, int]:
+    def _calculate_stats(self, num_rounds: int) -> Dict[str, Any]:
         """Report the statistics for the current run of this simulation.
+
+        Trip time percentiles are exact below 128 rounds, and estimated to
+        within about 1.6% above that.
         """
-        return {
+        stats = {
             'num_iterations': num_rounds,
             'total_people': self.num_of_arrivals,
-            'people_completed': len(self.people_completed),
+            'people_completed': self.trip_stats.count,
             'max_time': self.max_time(),
             'min_time': self.min_time(),
-            'avg_time': self.avg_time()
+            'avg_time': self.avg_time(),
+            'p50_time': self.trip_stats.percentile(50),
+            'p90_time': self.trip_stats.percentile(90),
+            'p99_time': self.trip_stats.percentile(99)
         }
+        if self._profile is not None:
+            stats['profile'] = self._profile.report()
+        return stats
 
     def max_time(self) -> int:
         """Returns the the maximum time someone spent before reaching their
@@ -192,35 +448,62 @@ class Simulation:
          (note that this includes time spent waiting on a floor and travelling
           on an elevator)
         """
-        max_time = -1
-        for person in self.people_completed:
-            if person.get_wait_time() > max_time:
-                max_time = person.get_wait_time()
-        return max_time
+        return self.trip_stats.max_time
 
     def min_time(self) -> int:
         """Returns the minimum time someone spent before reaching their
          target floor
          """
-        if len(self.people_completed) == 0:
-            return -1
-        min_rounds = self.people_completed[0].get_wait_time()
-        for person in self.people_completed:
-            if person.get_wait_time() < min_rounds:
-                min_rounds = person.get_wait_time()
-        return min_rounds
+        return self.trip_stats.min_time
 
     def avg_time(self) -> int:
         """Returns the average time someone spent before reaching their
          target floor, rounded down to the nearest integer
          """
-        if len(self.people_completed) == 0:
-            return -1
-        total_rounds = 0
-        for person in self.people_completed:
-            total_rounds += person.get_wait_time()
-        average_rounds = int(total_rounds / len(self.people_completed))
-        return average_rounds
+        return self.trip_stats.mean()
+
+
+class NullVisualizer:
+    """A visualizer for simulations that aren't visualized, which does
+    nothing.
+
+    It has the same methods as Visualizer, without needing Pygame.
+    """
+
+    def render_header(self, round_num: int) -> None:
+        """Do nothing."""
+
+    def render(self) -> None:
+        """Do nothing."""
+
+    def show_arrivals(self, arrivals: Dict[int, List[Person]]) -> None:
+        """Do nothing."""
+
+    def show_boarding(self, person: Person, elevator: Elevator) -> None:
+        """Do nothing."""
+
+    def show_boardings(self,
+                       boardings: List[Tuple[Person, Elevator]]) -> None:
+        """Do nothing."""
+
+    def show_disembarking(self, person: Person, elevator: Elevator) -> None:
+        """Do nothing."""
+
+    def show_disembarkings(self,
+                           disembarkings: List[Tuple[Person, Elevator]]
+                           ) -> None:
+        """Do nothing."""
+
+    def show_elevator_moves(self, elevators: List[Elevator],
+                            directions: List[Direction]) -> None:
+        """Do nothing."""
+
+    def show_state(self, elevators: List[Elevator],
+                   waiting: Dict[int, List[Person]]) -> None:
+        """Do nothing."""
+
+    def wait(self, wait_time: float) -> None:
+        """Do nothing."""
 
 
 def sample_run() -> Dict[str, int]:
@@ -0,0 +1,279 @@
+"""CSC148 Assignment 1 - Parameter Sweeps
+
+=== CSC148 Fall 2018 ===
+Department of Computer Science,
+University of Toronto
+
+=== Module Description ===
+
+This file contains a harness for sweeping simulation parameters over a grid,
+running every cell of the grid in parallel, and caching each result on disk.
+
+A cell is a dictionary of the parameters that describe one configuration:
+    - num_floors
+    - num_elevators
+    - elevator_capacity
+    - num_people_per_round
+    - moving_algorithm: the name of a moving algorithm in algorithms.py, or
+      the module and class name of one defined elsewhere, such as
+      dispatch.EtaDispatcher
+Each cell is run with random arrivals, once per seed.
+
+Results are cached under a key built from the cell, the number of rounds, the
+seed and a hash of the source code the cell runs: the simulation's own files,
+and the source of the cell's moving algorithm and arrival generator classes
+(with their base classes). Re-running a sweep only computes cells that have
+not been computed before, editing the simulation or a cell's algorithm
+automatically invalidates its old results, and adding a new algorithm to
+algorithms.py leaves the results of the other algorithms cached. Editing a
+helper function that an algorithm calls, in algorithms.py or its own module,
+does not invalidate its results, so clear the cache after doing so.
+
+Run this file to sweep from the command line, for example:
+    python sweep.py --floors 6 20 --elevators 2 4 --algorithms \\
+        PushyPassenger ShortSighted --rounds 200 --seeds 10
+"""
+import argparse
+import csv
+import functools
+import hashlib
+import importlib
+import itertools
+import json
+import inspect
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import algorithms
+from replication import run_replication
+
+# The source files whose contents determine a simulation's results, apart
+# from the algorithms it runs (see algorithm_version).
+SOURCE_FILES = ['entities.py', 'occupancy.py', 'replication.py',
+                'simulation.py', 'trip_statistics.py']
+
+DEFAULT_CACHE_DIR = '.sweep_cache'
+
+
+@functools.lru_cache(maxsize=None)
+def code_version() -> str:
+    """Return a hash of the source files that determine simulation results.
+    """
+    digest = hashlib.sha256()
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for filename in SOURCE_FILES:
+        with open(os.path.join(directory, filename), 'rb') as source:
+            digest.update(source.read())
+    return digest.hexdigest()
+
+
+def moving_algorithm_class(name: str) -> type:
+    """Return the moving algorithm class with the given name.
+
+    A plain name is looked up in algorithms.py. A dotted name is the module
+    and class name of an algorithm defined elsewhere, and the module is
+    imported when needed.
+
+    >>> moving_algorithm_class('ShortSighted') is algorithms.ShortSighted
+    True
+    """
+    module_name, _, class_name = name.rpartition('.')
+    module = importlib.import_module(module_name) if module_name \
+        else algorithms
+    return getattr(module, class_name)
+
+
+@functools.lru_cache(maxsize=None)
+def algorithm_version(moving_algorithm: str) -> str:
+    """Return a hash of the source of the classes that a cell with the
+    given moving algorithm runs: the moving algorithm, the arrival
+    generator, their base classes, and Direction.
+    """
+    classes = [algorithms.Direction]
+    for cls in [moving_algorithm_class(moving_algorithm),
+                algorithms.RandomArrivals]:
+        classes.extend(base for base in cls.__mro__ if base is not object)
+    digest = hashlib.sha256()
+    for cls in classes:
+        digest.update(inspect.getsource(cls).encode())
+    return digest.hexdigest()
+
+
+def expand_grid(grid: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """Return every combination of the values in the given grid, as a list
+    of cells.
+
+    >>> expand_grid({'num_floors': [6, 10], 'num_elevators': [2]})
+    [{'num_floors': 6, 'num_elevators': 2}, {'num_floors': 10, \
+'num_elevators': 2}]
+    """
+    keys = list(grid)
+    return [dict(zip(keys, values))
+            for values in itertools.product(*(grid[key] for key in keys))]
+
+
+def build_config(cell: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the simulation configuration described by the given cell."""
+    return {
+        'num_floors': cell['num_floors'],
+        'num_elevators': cell['num_elevators'],
+        'elevator_capacity': cell['elevator_capacity'],
+        'num_people_per_round': cell['num_people_per_round'],
+        'arrival_generator': algorithms.RandomArrivals(
+            cell['num_floors'], cell['num_people_per_round']),
+        'moving_algorithm': moving_algorithm_class(
+            cell['moving_algorithm'])(),
+        'visualize': False
+    }
+
+
+def cache_key(cell: Dict[str, Any], num_rounds: int, seed: int) -> str:
+    """Return the cache key for running the given cell with the given number
+    of rounds and seed, using the current version of the code it runs.
+    """
+    description = json.dumps({
+        'cell': cell, 'num_rounds': num_rounds, 'seed': seed,
+        'code': code_version(),
+        'algorithm': algorithm_version(cell['moving_algorithm'])
+    }, sort_keys=True)
+    return hashlib.sha256(description.encode()).hexdigest()
+
+
+class ResultCache:
+    """A directory of cached simulation results, one JSON file per key.
+
+    === Attributes ===
+    directory: the directory the results are stored in
+    """
+    directory: str
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+
+    def _path(self, key: str) -> str:
+        """Return the path of the file for the given key."""
+        return os.path.join(self.directory, key[:2], key + '.json')
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the result stored under the given key, or None if there
+        isn't one.
+        """
+        try:
+            with open(self._path(key)) as result_file:
+                return json.load(result_file)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        """Store the given result under the given key.
+
+        The result is written to a temporary file first, so an interrupted
+        sweep never leaves a partial result behind.
+        """
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        with open(temp_path, 'w') as result_file:
+            json.dump(result, result_file)
+        os.replace(temp_path, path)
+
+
+def _run_cell(args: List[Any]) -> Dict[str, int]:
+    """Run one cell with one seed in a worker process."""
+    cell, num_rounds, seed = args
+    return run_replication(build_config(cell), num_rounds, seed)
+
+
+def run_sweep(grid: Dict[str, List[Any]], num_rounds: int,
+              seeds: List[int], cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+              processes: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Run every cell of the given grid once per seed, and return one row per
+    run: the cell's parameters, the seed, and the simulation's statistics.
+
+    Results found in the cache are reused; everything else is run in
+    <processes> worker processes (by default, one per CPU) and then added to
+    the cache. If cache_dir is None, nothing is cached.
+    """
+    cache = ResultCache(cache_dir) if cache_dir is not None else None
+    runs = [(cell, seed) for cell in expand_grid(grid) for seed in seeds]
+    results = {}
+    missing = []
+    for i, (cell, seed) in enumerate(runs):
+        cached = None
+        if cache is not None:
+            cached = cache.get(cache_key(cell, num_rounds, seed))
+        if cached is None:
+            missing.append(i)
+        else:
+            results[i] = cached
+
+    if len(missing) > 0:
+        tasks = [[runs[i][0], num_rounds, runs[i][1]] for i in missing]
+        if processes == 1:
+            computed = [_run_cell(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=processes) as executor:
+                computed = list(executor.map(_run_cell, tasks))
+        for i, result in zip(missing, computed):
+            results[i] = result
+            if cache is not None:
+                cell, seed = runs[i]
+                cache.put(cache_key(cell, num_rounds, seed), result)
+
+    return [dict(cell, seed=seed, **results[i])
+            for i, (cell, seed) in enumerate(runs)]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run a sweep described by the given command line arguments, and write
+    the results to standard output (or a file) as CSV.
+    """
+    parser = argparse.ArgumentParser(
+        description='Sweep elevator simulation parameters over a grid.')
+    parser.add_argument('--floors', type=int, nargs='+', default=[6])
+    parser.add_argument('--elevators', type=int, nargs='+', default=[2])
+    parser.add_argument('--capacity', type=int, nargs='+', default=[3])
+    parser.add_argument('--people', type=int, nargs='+', default=[2],
+                        help='people arriving per round')
+    parser.add_argument('--algorithms', nargs='+',
+                        default=['RandomAlgorithm', 'PushyPassenger',
+                                 'ShortSighted', 'LookAlgorithm'],
+                        help='names of algorithms in algorithms.py, or '
+                             'module.Class for others')
+    parser.add_argument('--rounds', type=int, default=100)
+    parser.add_argument('--seeds', type=int, default=1,
+                        help='number of seeds per cell, starting from 0')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    parser.add_argument('--no-cache', action='store_true')
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--output', default=None,
+                        help='CSV file to write (default: standard output)')
+    args = parser.parse_args(argv)
+
+    grid = {
+        'num_floors': args.floors,
+        'num_elevators': args.elevators,
+        'elevator_capacity': args.capacity,
+        'num_people_per_round': args.people,
+        'moving_algorithm': args.algorithms
+    }
+    rows = run_sweep(grid, args.rounds, list(range(args.seeds)),
+                     None if args.no_cache else args.cache_dir,
+                     args.processes)
+    if len(rows) == 0:
+        parser.error('nothing to run: --seeds must be at least 1')
+
+    output = open(args.output, 'w', newline='') if args.output else sys.stdout
+    try:
+        writer = csv.DictWriter(output, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == '__main__':
+    main()
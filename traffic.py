@@ -0,0 +1,393 @@
+"""CSC148 Assignment 1 - Vectorized Traffic
+
+=== CSC148 Fall 2018 ===
+Department of Computer Science,
+University of Toronto
+
+=== Module Description ===
+
+This file contains arrival generators that use NumPy to draw people in bulk
+from their own seeded random number generator, rather than one at a time from
+the random module.
+
+Because each generator owns its random number generator, its arrivals depend
+only on its seed: they are unaffected by moving algorithms or anything else
+that uses the random module. Call reseed to give a copied generator its own
+independent stream (run_replication does this with each replication's seed).
+
+Besides generate, these generators have a generate_arrays method that returns
+a round's arrivals as arrays of starting and target floors, sorted by starting
+floor, without creating any Person objects.
+
+BatchedRandomArrivals draws a fixed number of people per round uniformly over
+all floors. PoissonArrivals models traffic that changes over the day, such as
+a morning up-peak, lunch time and an evening down-peak: each period of the day
+has an arrival rate and an origin-destination matrix, the number of arrivals
+each round is drawn from a Poisson distribution, and floor pairs are drawn from
+an alias table, so each draw takes constant time however many floors there
+are. business_day builds a typical office building's periods.
+"""
+import bisect
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from algorithms import ArrivalGenerator, RandomArrivals
+from entities import Person
+
+
+class BatchedRandomArrivals(RandomArrivals):
+    """Generate a fixed number of random people each round, drawing a block
+    of rounds at a time.
+
+    Each person's starting and target floors are drawn uniformly, with the
+    target drawn from the other floors, so they are never the same.
+
+    === Attributes ===
+    block_rounds: the number of rounds of arrivals drawn at once
+
+    === Private Attributes ===
+    _rng: this generator's random number generator
+    _starts: the starting floors of the current block, one row per round
+    _targets: the target floors of the current block, one row per round
+    _next_row: the row of the current block to use for the next round
+
+    === Representation invariants ===
+    block_rounds >= 1
+    0 <= _next_row <= len(_starts)
+    """
+    block_rounds: int
+    _rng: np.random.Generator
+    _starts: np.ndarray
+    _targets: np.ndarray
+    _next_row: int
+
+    def __init__(self, max_floor: int, num_people: Optional[int],
+                 seed: Optional[int] = None, block_rounds: int = 256) -> None:
+        """Initialize a new BatchedRandomArrivals algorithm, seeded with the
+        given seed (or unpredictably, if it is None).
+
+        Precondition: block_rounds >= 1
+        """
+        RandomArrivals.__init__(self, max_floor, num_people)
+        self.block_rounds = block_rounds
+        self.reseed(seed)
+
+    def reseed(self, seed: Optional[int]) -> None:
+        """Restart this generator's random number generator from the given
+        seed, discarding any arrivals already drawn.
+        """
+        self._rng = np.random.default_rng(seed)
+        self._starts = np.empty((0, 0), dtype=np.int64)
+        self._targets = np.empty((0, 0), dtype=np.int64)
+        self._next_row = 0
+
+    def _draw_block(self) -> None:
+        """Draw the starting and target floors for the next block of rounds,
+        sorted by starting floor within each round.
+        """
+        shape = (self.block_rounds, self.num_people)
+        starts = self._rng.integers(1, self.max_floor + 1, size=shape)
+        # Draw from the other max_floor - 1 floors, skipping over the start.
+        targets = self._rng.integers(1, self.max_floor, size=shape)
+        targets += targets >= starts
+        order = np.argsort(starts, axis=1, kind='stable')
+        self._starts = np.take_along_axis(starts, order, axis=1)
+        self._targets = np.take_along_axis(targets, order, axis=1)
+        self._next_row = 0
+
+    def generate_arrays(self, round_num: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the starting and target floors of the new arrivals at the
+        given round, sorted by starting floor.
+
+        Rounds are drawn in the order this method is called; the round number
+        itself is not used.
+        """
+        if self.num_people is None or self.num_people == 0:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty
+        if self._next_row == len(self._starts):
+            self._draw_block()
+        row = self._next_row
+        self._next_row += 1
+        return self._starts[row], self._targets[row]
+
+    def generate(self, round_num: int) -> Dict[int, List[Person]]:
+        """Return the new arrivals for the simulation at the given round.
+
+        The returned dictionary maps floor number to the people who
+        arrived starting at that floor.
+        """
+        starts, targets = self.generate_arrays(round_num)
+        return group_by_floor(self.person_type, starts, targets)
+
+
+def group_by_floor(person_type: type, starts: np.ndarray,
+                   targets: np.ndarray) -> Dict[int, List[Person]]:
+    """Return a dictionary mapping each starting floor to the people of the
+    given type who start there.
+
+    Precondition: starts is sorted, and len(starts) == len(targets)
+    """
+    if len(starts) == 0:
+        return {}
+    people = list(map(person_type, starts.tolist(), targets.tolist()))
+    # The first index of each run of equal starting floors.
+    firsts = [0] + (np.flatnonzero(starts[1:] != starts[:-1]) + 1).tolist()
+    floors = starts[firsts].tolist()
+    firsts.append(len(people))
+    return {floor: people[firsts[i]:firsts[i + 1]]
+            for i, floor in enumerate(floors)}
+
+
+def build_alias_table(weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the probability and alias arrays of an alias table for drawing
+    index i with probability proportional to weights[i].
+
+    To draw, pick a column i uniformly, then keep i with probability
+    probability[i], and otherwise use alias[i] (Vose's alias method).
+
+    Precondition: weights is one-dimensional, non-negative, and has a
+    positive sum.
+    """
+    n = len(weights)
+    scaled = (weights * (n / weights.sum())).tolist()
+    probability = [1.0] * n
+    alias = list(range(n))
+    small = [i for i, value in enumerate(scaled) if value < 1.0]
+    large = [i for i, value in enumerate(scaled) if value >= 1.0]
+    while len(small) > 0 and len(large) > 0:
+        less = small.pop()
+        more = large[-1]
+        probability[less] = scaled[less]
+        alias[less] = more
+        scaled[more] -= 1.0 - scaled[less]
+        if scaled[more] < 1.0:
+            small.append(large.pop())
+    # Whatever is left over is 1 up to rounding error.
+    return np.array(probability), np.array(alias, dtype=np.int64)
+
+
+class TrafficPeriod:
+    """A period of the day with steady traffic.
+
+    === Attributes ===
+    num_rounds: the length of the period, in rounds
+    rate: the average number of people arriving each round
+    demand: demand[s - 1][t - 1] is the relative number of people travelling
+            from floor s to floor t; the diagonal is ignored
+
+    === Representation invariants ===
+    num_rounds >= 1
+    rate >= 0
+    demand is a square matrix of non-negative weights
+    rate == 0 or demand has a positive weight off the diagonal
+    """
+    num_rounds: int
+    rate: float
+    demand: np.ndarray
+
+    def __init__(self, num_rounds: int, rate: float,
+                 demand: Sequence[Sequence[float]]) -> None:
+        self.num_rounds = num_rounds
+        self.rate = rate
+        self.demand = np.array(demand, dtype=np.float64)
+
+
+class PoissonArrivals(ArrivalGenerator):
+    """Generate Poisson arrivals whose rate and destinations follow a daily
+    profile.
+
+    The profile is a list of periods that is repeated every day. In each round
+    the number of arrivals is Poisson distributed with the current period's
+    rate, and each person's starting and target floors are drawn from the
+    period's origin-destination matrix.
+
+    === Attributes ===
+    periods: the periods of one day, in order
+    day_length: the number of rounds in one day
+    block_rounds: the maximum number of rounds of arrivals drawn at once
+
+    === Private Attributes ===
+    _rng: this generator's random number generator
+    _period_ends: the round of the day at which each period ends
+    _tables: the probability and alias arrays of each period's demand
+    _block_first: the first round of the current block
+    _block_offsets: where each round of the current block starts in the
+                    block's arrays
+    _starts: the starting floors of the current block
+    _targets: the target floors of the current block
+
+    === Representation invariants ===
+    day_length == sum of the periods' num_rounds
+    block_rounds >= 1
+    """
+    periods: List[TrafficPeriod]
+    day_length: int
+    block_rounds: int
+    _rng: np.random.Generator
+    _period_ends: List[int]
+    _tables: List[Optional[Tuple[np.ndarray, np.ndarray]]]
+    _block_first: int
+    _block_offsets: List[int]
+    _starts: np.ndarray
+    _targets: np.ndarray
+
+    def __init__(self, max_floor: int, periods: List[TrafficPeriod],
+                 seed: Optional[int] = None, block_rounds: int = 256) -> None:
+        """Initialize a new PoissonArrivals algorithm with the given daily
+        profile, seeded with the given seed (or unpredictably, if it is
+        None).
+
+        Preconditions:
+            len(periods) >= 1
+            every period's demand matrix is max_floor by max_floor
+            block_rounds >= 1
+        """
+        ArrivalGenerator.__init__(self, max_floor, None)
+        self.periods = periods
+        self.block_rounds = block_rounds
+        self._period_ends = []
+        self._tables = []
+        end = 0
+        for period in periods:
+            end += period.num_rounds
+            self._period_ends.append(end)
+            weights = period.demand.copy()
+            np.fill_diagonal(weights, 0.0)
+            if period.rate > 0:
+                self._tables.append(build_alias_table(weights.ravel()))
+            else:
+                self._tables.append(None)
+        self.day_length = end
+        self.reseed(seed)
+
+    def reseed(self, seed: Optional[int]) -> None:
+        """Restart this generator's random number generator from the given
+        seed, discarding any arrivals already drawn.
+        """
+        self._rng = np.random.default_rng(seed)
+        self._block_first = 0
+        self._block_offsets = [0]
+        self._starts = np.empty(0, dtype=np.int64)
+        self._targets = np.empty(0, dtype=np.int64)
+
+    def _draw_block(self, round_num: int) -> None:
+        """Draw the arrivals for a block of rounds starting at the given
+        round, sorted by round and then by starting floor.
+
+        A block never crosses the end of a period.
+        """
+        time_of_day = round_num % self.day_length
+        period_index = bisect.bisect_right(self._period_ends, time_of_day)
+        period = self.periods[period_index]
+        num_rounds = min(self.block_rounds,
+                         self._period_ends[period_index] - time_of_day)
+
+        self._block_first = round_num
+        if self._tables[period_index] is None:
+            self._block_offsets = [0] * (num_rounds + 1)
+            self._starts = np.empty(0, dtype=np.int64)
+            self._targets = np.empty(0, dtype=np.int64)
+            return
+
+        counts = self._rng.poisson(period.rate, size=num_rounds)
+        offsets = np.zeros(num_rounds + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        total = int(offsets[-1])
+
+        probability, alias = self._tables[period_index]
+        columns = self._rng.integers(0, len(alias), size=total)
+        keep = self._rng.random(total) < probability[columns]
+        pairs = np.where(keep, columns, alias[columns])
+        starts = pairs // self.max_floor + 1
+        targets = pairs % self.max_floor + 1
+
+        rounds = np.repeat(np.arange(num_rounds), counts)
+        order = np.lexsort((starts, rounds))
+        self._block_offsets = offsets.tolist()
+        self._starts = starts[order]
+        self._targets = targets[order]
+
+    def next_arrival_round(self, round_num: int) -> Optional[int]:
+        """Return the first round, from the given round on, in which anyone
+        might arrive, or None if nobody will ever arrive again.
+
+        Nobody arrives during a period whose rate is zero, such as the night,
+        so these rounds are skipped up to the start of the next period with
+        a positive rate (possibly on the next day). Skipping them draws no
+        random numbers, so the arrivals that follow are unchanged.
+        """
+        time_of_day = round_num % self.day_length
+        period_index = bisect.bisect_right(self._period_ends, time_of_day)
+        day_start = round_num - time_of_day
+        for step in range(len(self.periods) + 1):
+            index = (period_index + step) % len(self.periods)
+            if self._tables[index] is not None:
+                period_start = self._period_ends[index] - \
+                    self.periods[index].num_rounds
+                day = (period_index + step) // len(self.periods)
+                return max(round_num,
+                           day_start + day * self.day_length + period_start)
+        return None
+
+    def generate_arrays(self, round_num: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the starting and target floors of the new arrivals at the
+        given round, sorted by starting floor.
+        """
+        row = round_num - self._block_first
+        if not 0 <= row < len(self._block_offsets) - 1:
+            self._draw_block(round_num)
+            row = 0
+        first = self._block_offsets[row]
+        last = self._block_offsets[row + 1]
+        return self._starts[first:last], self._targets[first:last]
+
+    def generate(self, round_num: int) -> Dict[int, List[Person]]:
+        """Return the new arrivals for the simulation at the given round.
+
+        The returned dictionary maps floor number to the people who
+        arrived starting at that floor.
+        """
+        starts, targets = self.generate_arrays(round_num)
+        return group_by_floor(self.person_type, starts, targets)
+
+
+def business_day(max_floor: int, people_per_hour: float,
+                 rounds_per_hour: int = 60) -> List[TrafficPeriod]:
+    """Return the periods of a typical office day from 8:00 to 18:00, for a
+    building with the lobby on floor 1 and offices on every other floor.
+
+    Traffic peaks at <people_per_hour> during the morning up-peak (people
+    arriving at the lobby and going to their offices), lunch time (people
+    going to and from the lobby, and some between floors) and the evening
+    down-peak (people going from their offices to the lobby). The rest of the
+    day has light traffic between floors.
+
+    Precondition: max_floor >= 2, rounds_per_hour >= 1
+    """
+    up = np.zeros((max_floor, max_floor))
+    up[0, 1:] = 1.0
+    down = up.T.copy()
+    between = np.ones((max_floor, max_floor))
+    between[0, :] = 0.2
+    between[:, 0] = 0.2
+    lunch = up + down + 0.5 * between
+    rate = people_per_hour / rounds_per_hour
+    return [
+        TrafficPeriod(rounds_per_hour, rate, up + 0.05 * between),
+        TrafficPeriod(3 * rounds_per_hour, 0.2 * rate, between),
+        TrafficPeriod(rounds_per_hour, 0.6 * rate, lunch),
+        TrafficPeriod(4 * rounds_per_hour, 0.2 * rate, between),
+        TrafficPeriod(rounds_per_hour, rate, down + 0.05 * between)
+    ]
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'extra-imports': ['numpy', 'algorithms', 'entities'],
+        'max-nested-blocks': 4,
+        'disable': ['R0201'],
+        'max-attributes': 12
+    })
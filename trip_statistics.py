@@ -0,0 +1,137 @@
+"""CSC148 Assignment 1 - Trip Statistics
+
+=== CSC148 Fall 2018 ===
+Department of Computer Science,
+University of Toronto
+
+=== Module Description ===
+
+This file contains the TripStatistics class, which summarizes how long people
+took to reach their target floor without keeping the people themselves.
+
+Every recorded trip time updates the count, total, minimum and maximum in
+constant time, and is added to a fixed-size histogram used to estimate
+percentiles. Trip times below EXACT_LIMIT are counted exactly; larger ones
+are grouped into buckets whose width is at most 1/SUB_BUCKETS of their value,
+so percentile estimates are within about 1.6% of the true value. The memory
+used is the same whether one trip or a billion trips are recorded.
+"""
+import math
+from typing import List
+
+# Trip times below this value each get their own histogram bucket.
+EXACT_LIMIT = 128
+# The number of buckets each power of two above EXACT_LIMIT is split into.
+SUB_BUCKETS = 64
+# Enough buckets for every trip time that fits in a 63-bit integer.
+NUM_BUCKETS = EXACT_LIMIT + (63 - 7) * SUB_BUCKETS
+
+
+def _bucket_index(trip_time: int) -> int:
+    """Return the index of the histogram bucket for the given trip time.
+
+    Precondition: 0 <= trip_time < 2 ** 63
+    """
+    if trip_time < EXACT_LIMIT:
+        return trip_time
+    shift = trip_time.bit_length() - 7
+    return EXACT_LIMIT + (shift - 1) * SUB_BUCKETS + \
+        (trip_time >> shift) - SUB_BUCKETS
+
+
+def _bucket_bounds(index: int) -> List[int]:
+    """Return the smallest and largest trip times in the given bucket."""
+    if index < EXACT_LIMIT:
+        return [index, index]
+    shift = (index - EXACT_LIMIT) // SUB_BUCKETS + 1
+    mantissa = (index - EXACT_LIMIT) % SUB_BUCKETS + SUB_BUCKETS
+    return [mantissa << shift, ((mantissa + 1) << shift) - 1]
+
+
+class TripStatistics:
+    """Streaming statistics for the trip times of people who have reached
+    their target floor.
+
+    A trip time is the number of rounds between a person arriving and
+    reaching their target floor, including the time spent on an elevator.
+
+    === Attributes ===
+    count: the number of trips recorded
+    total: the sum of all recorded trip times
+    min_time: the shortest recorded trip time, or -1 if there are none
+    max_time: the longest recorded trip time, or -1 if there are none
+
+    === Private Attributes ===
+    _histogram: the number of recorded trip times in each bucket
+
+    === Representation invariants ===
+    count >= 0
+    count == sum(_histogram)
+    count == 0 or 0 <= min_time <= max_time
+    len(_histogram) == NUM_BUCKETS
+    """
+    count: int
+    total: int
+    min_time: int
+    max_time: int
+    _histogram: List[int]
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0
+        self.min_time = -1
+        self.max_time = -1
+        self._histogram = [0] * NUM_BUCKETS
+
+    def record(self, trip_time: int, count: int = 1) -> None:
+        """Record <count> trips that each took the given number of rounds.
+
+        Precondition: trip_time >= 0 and count >= 1
+        """
+        if self.count == 0 or trip_time < self.min_time:
+            self.min_time = trip_time
+        if trip_time > self.max_time:
+            self.max_time = trip_time
+        self.count += count
+        self.total += trip_time * count
+        self._histogram[_bucket_index(trip_time)] += count
+
+    def mean(self) -> int:
+        """Return the average trip time, rounded down to the nearest integer,
+        or -1 if no trips have been recorded.
+        """
+        if self.count == 0:
+            return -1
+        return self.total // self.count
+
+    def percentile(self, percent: float) -> int:
+        """Return the smallest trip time that at least <percent> percent of
+        the recorded trips took no longer than, or -1 if no trips have been
+        recorded.
+
+        Exact for trip times below EXACT_LIMIT, and an estimate within the
+        width of one histogram bucket above it.
+
+        Precondition: 0 <= percent <= 100
+        """
+        if self.count == 0:
+            return -1
+        # Nearest-rank method: the rank of the trip we are looking for.
+        rank = max(1, math.ceil(self.count * percent / 100))
+        seen = 0
+        for index, bucket_count in enumerate(self._histogram):
+            seen += bucket_count
+            if seen >= rank:
+                low, high = _bucket_bounds(index)
+                middle = (low + high) // 2
+                return max(self.min_time, min(self.max_time, middle))
+        return self.max_time
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'max-nested-blocks': 4,
+        'disable': ['R0201'],
+        'max-attributes': 12
+    })
@@ -0,0 +1,48 @@
+"""CSC148 Assignment 1 - Visual People and Elevators
+
+=== CSC148 Fall 2018 ===
+Department of Computer Science,
+University of Toronto
+
+=== Module description ===
+This module contains sprite-backed versions of the two "basic" entities in
+this simulation. VisualPerson and VisualElevator behave exactly like Person and
+Elevator from entities.py, but also inherit from a kind of sprite found in
+sprites.py, so that their instances can be drawn by the Visualizer.
+
+Constructing a sprite loads and scales an image, so these classes should only
+be used when a simulation is actually being visualized.
+"""
+from __future__ import annotations
+from entities import Person, Elevator
+from sprites import PersonSprite, ElevatorSprite
+
+
+class VisualElevator(Elevator, ElevatorSprite):
+    """An elevator in the elevator simulation that can be visualized.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        Elevator.__init__(self, capacity)
+        ElevatorSprite.__init__(self)
+
+
+class VisualPerson(Person, PersonSprite):
+    """A person in the elevator simulation that can be visualized.
+    """
+
+    def __init__(self, start: int, target: int) -> None:
+        # The sprite picks its image from the anger level, so the person's
+        # state must be initialized first.
+        Person.__init__(self, start, target)
+        PersonSprite.__init__(self)
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'extra-imports': ['entities', 'sprites'],
+        'max-nested-blocks': 4,
+        'disable': ['R0201'],
+        'max-attributes': 12
+    })
@@ -1,222 +1,579 @@
-"""CSC148 Assignment 1 - Visualizer
-
-=== CSC148 Fall 2018 ===
-Department of Computer Science,
-University of Toronto
-
-=== Module Description ===
-
-This file contains the Visualizer class, which is responsible for interacting
-with Pygame, the graphics library we're using for this assignment.
-There's quite a bit in this file, but you aren't responsible for most of it.
-
-DO NOT CHANGE ANY CODE IN THIS FILE. You don't need to for this assignment,
-and in fact you aren't even submitting this file!
-"""
-from __future__ import annotations
-import random
-import time
-from typing import Dict, List
-
-import pygame
-from algorithms import Direction
-import sprites
-
-
-# Colour constants
-WHITE = (255, 255, 255)
-
-# Dimensions for various objects
-WIDTH = 900               # Screen width
-STAT_WINDOW_HEIGHT = 100  # Space at the top for stats and messages
-FLOOR_HEIGHT = 100        # The height of each floor (including the border)
-FLOOR_BORDER_HEIGHT = 10  # The height of the border
-
-# FPS based on config speed
-FPS = 60
-
-
-class Visualizer:
-    """Visualizer for the current state of a simulation.
-
-    All attributes of this class are private; you are not responsible for
-    understanding them, and they are left undocumented.
-    """
-    def __init__(self,
-                 elevators: List[sprites.ElevatorSprite],
-                 num_floors: int,
-                 visualize: bool) -> None:
-        """Initialize this visualization.
-
-        If visualize is False, this instance does nothing.
-        """
-        self._visualize = visualize
-        if not self._visualize:
-            return
-
-        self._num_elevators = len(elevators)
-        self._num_floors = num_floors
-
-        # pygame stuff
-        pygame.init()
-        self._clock = pygame.time.Clock()
-
-        self._screen = pygame.display.set_mode(
-            (WIDTH, self._total_height()), pygame.HWSURFACE | pygame.DOUBLEBUF)
-        self._screen.fill(WHITE)
-
-        # Contains all sprites in the simulation
-        self._sprite_group = pygame.sprite.Group()
-        self._stats_group = pygame.sprite.Group()
-
-        self._setup_sprites(elevators)
-        # Initial render.
-        self.render()
-
-    def render_header(self, round_num: int) -> None:
-        """Render text displaying the round number for this simulation."""
-        if not self._visualize:
-            return
-        self._stats_group.remove(list(self._stats_group))
-        self._stats_group.add(sprites.StatLine(0, f'Round {round_num}'))
-        for sprite in self._sprite_group:
-            if isinstance(sprite, sprites.PersonSprite):
-                sprite.image = sprite.load_image()
-        self.render()
-
-    def _total_height(self) -> int:
-        """Return the screen height for this visualization."""
-        return self._num_floors * FLOOR_HEIGHT + STAT_WINDOW_HEIGHT
-
-    def get_y_of_floor(self, floor: int) -> int:
-        """Return the y-coordinate of the given floor."""
-        assert self._num_floors >= floor >= 1, f'{self._num_floors}, {floor}'
-        return (
-            self._total_height() -
-            (floor - 1) * FLOOR_HEIGHT -
-            FLOOR_BORDER_HEIGHT
-        )
-
-    def render(self) -> None:
-        """Draw the current state of the simulation to the screen.
-        """
-        if not self._visualize:
-            return
-
-        # Need this on OSX due to pygame bug
-        pygame.event.peek(0)
-
-        self._screen.fill(WHITE)
-        self._sprite_group.draw(self._screen)
-        self._stats_group.draw(self._screen)
-        self._clock.tick(FPS)
-        pygame.display.flip()
-
-    def show_arrivals(self,
-                      arrivals: Dict[int, List[sprites.PersonSprite]]) -> None:
-        """Show new arrivals."""
-        if not self._visualize:
-            return
-
-        x = 10
-        for floor, people in arrivals.items():
-            y = self.get_y_of_floor(floor)
-            for person in people:
-                person.rect.bottom = y
-                person.rect.centerx = x + random.randint(-3, 3)
-                self._sprite_group.add(person)
-        self.render()
-
-    def show_boarding(self, person: sprites.PersonSprite,
-                      elevator: sprites.ElevatorSprite) -> None:
-        """Show boarding of the given person onto the given elevator.
-
-        Precondition: the given person is on the same floor as the elevator.
-        """
-        if not self._visualize:
-            return
-
-        from_x = 10
-        target_x = elevator.rect.centerx + random.randint(-3, 3)
-
-        for frame in range(21):  # Move in 20 seconds
-            person.rect.centerx = from_x + (target_x - from_x) * frame // 20
-            self.render()
-
-        elevator.update()
-        self.render()
-
-    def show_disembarking(self, person: sprites.PersonSprite,
-                          elevator: sprites.ElevatorSprite) -> None:
-        """Show disembarking of the given person from the given elevator."""
-        if not self._visualize:
-            return
-
-        from_x = person.rect.centerx
-        target_x = WIDTH - 10
-
-        elevator.update()
-
-        for frame in range(21):  # Move in 20 seconds
-            x = from_x + (target_x - from_x) * frame // 20
-            person.rect.centerx = x
-            self.render()
-
-    def show_elevator_moves(self,
-                            elevators: List['Elevator'],
-                            directions: List[Direction]) -> None:
-        """Show elevator moves. Note that all the elevators move at once."""
-        if not self._visualize:
-            return
-
-        for _ in range(20):  # Move in 20 seconds
-            for elevator, direction in zip(elevators, directions):
-                if direction == Direction.UP:
-                    step = - FLOOR_HEIGHT / 20
-                elif direction == Direction.DOWN:
-                    step = FLOOR_HEIGHT / 20
-                else:
-                    step = 0
-                elevator.rect.bottom += step
-                for passenger in elevator.passengers:
-                    passenger.rect.bottom += step
-
-            self.render()
-
-    def wait(self, wait_time: int) -> None:
-        """Wait for the specified amount of time, in seconds.
-
-        Only occurs if self.visualize is true, otherwise there's no need to
-        wait.
-        """
-        if self._visualize:
-            time.sleep(wait_time)
-
-    def _setup_sprites(self, elevators: List[sprites.ElevatorSprite]) -> None:
-        """Set up the initial sprites for this visualization.
-
-        Position them on the screen and spaces them based on:
-            Size of the screen
-            Number of each item
-        """
-        for i in range(1, self._num_floors + 1):
-            y = self.get_y_of_floor(i)
-            floor = sprites.FloorSprite(WIDTH, FLOOR_HEIGHT, y)
-            floor_num = sprites.FloorNum(y - 20, str(i))
-            self._sprite_group.add(floor_num)
-            self._sprite_group.add(floor)
-
-        for i, elevator in enumerate(elevators):
-            elevator.rect.centerx =\
-                (i + 1) * WIDTH // (self._num_elevators + 1)
-            elevator.rect.bottom = self._total_height() - FLOOR_BORDER_HEIGHT
-
-            self._sprite_group.add(elevator)
-
-
-if __name__ == '__main__':
-    import python_ta
-    python_ta.check_all(config={
-        'extra-imports': ['random', 'pygame', 'time', 'algorithms'],
-        'generated-members': 'pygame.*'
-    })
+"""CSC148 Assignment 1 - Visualizer
+
+=== CSC148 Fall 2018 ===
+Department of Computer Science,
+University of Toronto
+
+=== Module Description ===
+
+This file contains the Visualizer class, which is responsible for interacting
+with Pygame, the graphics library we're using for this assignment.
+There's quite a bit in this file, but you aren't responsible for most of it.
+
+DO NOT CHANGE ANY CODE IN THIS FILE. You don't need to for this assignment,
+and in fact you aren't even submitting this file!
+"""
+from __future__ import annotations
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+import pygame
+from algorithms import Direction
+import occupancy
+import sprites
+
+
+# Colour constants
+WHITE = (255, 255, 255)
+
+# Dimensions for various objects
+WIDTH = 900               # Screen width
+STAT_WINDOW_HEIGHT = 100  # Space at the top for stats and messages
+FLOOR_HEIGHT = 100        # The height of each floor (including the border)
+FLOOR_BORDER_HEIGHT = 10  # The height of the border
+
+# FPS based on config speed
+FPS = 60
+
+# The number of frames each animation is drawn in
+ANIMATION_FRAMES = 20
+
+# The most floors shown at once; taller buildings are shown through a
+# viewport that scrolls
+MAX_VISIBLE_FLOORS = 8
+
+# Where the overview of a building too tall for the screen starts in the
+# stats window, and how many people waiting on a floor fill its bar
+OVERVIEW_LEFT = 250
+OVERVIEW_FULL_BAR = 20
+
+
+class Visualizer:
+    """Visualizer for the current state of a simulation.
+
+    All attributes of this class are private; you are not responsible for
+    understanding them, and they are left undocumented.
+
+    Sprites are positioned in building coordinates, as if the whole building
+    were drawn below the stats window. Only a viewport of at most
+    MAX_VISIBLE_FLOORS floors is actually drawn, with only the sprites inside
+    it, so neither the window nor the work done each frame grows with the
+    building. When the building doesn't fit, the viewport follows an
+    elevator, and can be scrolled with the arrow, Page Up, Page Down, Home and
+    End keys (F goes back to following). The stats window then also shows an
+    overview of the whole building: the floors in view, how many people are
+    waiting on each floor, and where the elevators are.
+
+    The floors in view are drawn once, onto a background. After that, each
+    frame only redraws the parts of the screen where a sprite has moved or
+    changed (the dirty rectangles), and only those parts are updated on the
+    display. Everyone boarding (or leaving) the elevators in a round is
+    animated at the same time, so a round takes the same number of frames
+    however busy it is.
+    """
+    def __init__(self,
+                 elevators: List[sprites.ElevatorSprite],
+                 num_floors: int,
+                 visualize: bool,
+                 speed: float = 1.0,
+                 follow: Optional[int] = 0) -> None:
+        """Initialize this visualization.
+
+        If visualize is False, this instance does nothing. Animations and
+        waits run <speed> times faster than normal. If the building doesn't
+        fit on the screen, the viewport follows the elevator with index
+        <follow>, or stays at the ground floor until scrolled if follow is
+        None.
+        """
+        self._visualize = visualize
+        if not self._visualize:
+            return
+
+        self._fps = FPS * speed
+        self._speed = speed
+
+        self._num_elevators = len(elevators)
+        self._num_floors = num_floors
+        self._elevators = elevators
+        self._waiting = {}
+        self._follow = follow
+        self._following = follow is not None
+
+        # The part of the building in view, starting at the ground floor
+        self._view = pygame.Rect(
+            0, 0, WIDTH, min(num_floors, MAX_VISIBLE_FLOORS) * FLOOR_HEIGHT)
+        self._view.bottom = self._total_height()
+
+        # pygame stuff
+        pygame.init()
+        self._clock = pygame.time.Clock()
+
+        self._screen = pygame.display.set_mode(
+            (WIDTH, STAT_WINDOW_HEIGHT + self._view.height),
+            pygame.HWSURFACE | pygame.DOUBLEBUF)
+        self._background = pygame.Surface(self._screen.get_size())
+        self._floor_image = sprites.FloorSprite(WIDTH, FLOOR_HEIGHT, 0).image
+        self._floor_labels = {}
+
+        # Contains all sprites in the simulation, and the same sprites and
+        # their rectangles as lists, in the order they are drawn
+        self._sprite_group = pygame.sprite.Group()
+        self._drawn = []
+        self._drawn_rects = []
+        self._stats_group = pygame.sprite.Group()
+
+        self._setup_sprites(elevators)
+        self._follow_elevator()
+        self._draw_background()
+        # Initial render.
+        self.render()
+
+    def render_header(self, round_num: int) -> None:
+        """Render text displaying the round number for this simulation."""
+        if not self._visualize:
+            return
+        self._stats_group.remove(list(self._stats_group))
+        self._stats_group.add(sprites.StatLine(0, f'Round {round_num}'))
+        if self._follow_elevator():
+            self._draw_background()
+            self.render()
+            return
+
+        dirty = []
+        for i in self._view.collidelistall(self._drawn_rects):
+            sprite = self._drawn[i]
+            if isinstance(sprite, sprites.PersonSprite):
+                image = sprite.image
+                sprite.refresh_image()
+                if sprite.image is not image:
+                    dirty.append(sprite.rect)
+        self._render_dirty(dirty, header=True)
+
+    def _total_height(self) -> int:
+        """Return the height of the whole building, including the stats
+        window.
+        """
+        return self._num_floors * FLOOR_HEIGHT + STAT_WINDOW_HEIGHT
+
+    def get_y_of_floor(self, floor: int) -> int:
+        """Return the y-coordinate of the given floor, in building
+        coordinates.
+        """
+        assert self._num_floors >= floor >= 1, f'{self._num_floors}, {floor}'
+        return (
+            self._total_height() -
+            (floor - 1) * FLOOR_HEIGHT -
+            FLOOR_BORDER_HEIGHT
+        )
+
+    def _floor_at(self, y: int) -> int:
+        """Return the floor whose storey contains the given y-coordinate, in
+        building coordinates, limited to the floors of the building.
+        """
+        floor = (self._total_height() - 1 - y) // FLOOR_HEIGHT + 1
+        return max(1, min(self._num_floors, floor))
+
+    def _offset(self) -> int:
+        """Return how far below its position on the screen everything in
+        view is in building coordinates.
+        """
+        return self._view.top - STAT_WINDOW_HEIGHT
+
+    def scroll_to(self, floor: int) -> None:
+        """Move the viewport so that the given floor is in the middle of it,
+        or as close as the building allows, and stop following an elevator.
+        """
+        if not self._visualize:
+            return
+        self._following = False
+        if self._center_on(floor):
+            self._draw_background()
+            self.render()
+
+    def _center_on(self, floor: int) -> bool:
+        """Move the viewport so that the given floor is in the middle of it,
+        or as close as the building allows, and return whether it moved.
+        """
+        floor = max(1, min(self._num_floors, floor))
+        old_top = self._view.top
+        self._view.centery = self.get_y_of_floor(floor) + \
+            FLOOR_BORDER_HEIGHT - FLOOR_HEIGHT // 2
+        self._view.bottom = min(self._view.bottom, self._total_height())
+        self._view.top = max(self._view.top, STAT_WINDOW_HEIGHT)
+        return self._view.top != old_top
+
+    def _follow_elevator(self) -> bool:
+        """If following an elevator that isn't completely in view, move the
+        viewport to it, and return whether the viewport moved.
+        """
+        if not self._following:
+            return False
+        elevator = self._elevators[self._follow]
+        if self._view.contains(elevator.rect):
+            return False
+        return self._center_on(elevator.current_floor)
+
+    def _handle_keys(self) -> bool:
+        """Scroll the viewport for the scrolling keys pressed since the last
+        frame, and return whether it moved.
+        """
+        moved = False
+        for event in pygame.event.get(pygame.KEYDOWN):
+            lowest = self._floor_at(self._view.bottom - 1)
+            highest = self._floor_at(self._view.top)
+            middle = (lowest + highest) // 2
+            targets = {
+                pygame.K_UP: middle + 1,
+                pygame.K_DOWN: middle - 1,
+                pygame.K_PAGEUP: middle + highest - lowest + 1,
+                pygame.K_PAGEDOWN: middle - highest + lowest - 1,
+                pygame.K_HOME: 1,
+                pygame.K_END: self._num_floors
+            }
+            if event.key in targets:
+                self._following = False
+                moved = self._center_on(targets[event.key]) or moved
+            elif event.key == pygame.K_f and self._follow is not None:
+                self._following = True
+                moved = self._follow_elevator() or moved
+        return moved
+
+    def _draw_background(self) -> None:
+        """Draw the floors in view onto the background."""
+        offset = self._offset()
+        self._background.fill(WHITE)
+        self._background.set_clip(
+            pygame.Rect(0, STAT_WINDOW_HEIGHT, WIDTH, self._view.height))
+        for floor in range(self._floor_at(self._view.bottom - 1),
+                           self._floor_at(self._view.top) + 1):
+            y = self.get_y_of_floor(floor) - offset
+            if floor not in self._floor_labels:
+                self._floor_labels[floor] = sprites.FloorNum(0, str(floor))
+            label = self._floor_labels[floor]
+            self._background.blit(label.image, label.rect.move(0, y - 20))
+            self._background.blit(self._floor_image, (0, y))
+        self._background.set_clip(None)
+
+    def _draw_header(self) -> None:
+        """Draw the stats window, with an overview of the building if it
+        doesn't fit on the screen.
+        """
+        header = pygame.Rect(0, 0, WIDTH, STAT_WINDOW_HEIGHT)
+        self._screen.set_clip(header)
+        self._screen.blit(self._background, header, header)
+        self._stats_group.draw(self._screen)
+        if self._view.height < self._num_floors * FLOOR_HEIGHT:
+            self._draw_overview()
+        self._screen.set_clip(None)
+
+    def _draw_overview(self) -> None:
+        """Draw an overview of the whole building in the stats window, with
+        its floors from left to right: the floors in view, a bar for the
+        number of people waiting on each floor, and a mark for each elevator.
+        """
+        left = OVERVIEW_LEFT
+        top = 10
+        width = WIDTH - left - 10
+        height = STAT_WINDOW_HEIGHT - 20
+        floor_width = width / self._num_floors
+
+        lowest = self._floor_at(self._view.bottom - 1)
+        highest = self._floor_at(self._view.top)
+        pygame.draw.rect(self._screen, sprites.YELLOW,
+                         (left + (lowest - 1) * floor_width, top,
+                          (highest - lowest + 1) * floor_width, height))
+        for floor in occupancy.waiting_floors(self._waiting):
+            bar = height * min(
+                1.0, len(self._waiting[floor]) / OVERVIEW_FULL_BAR)
+            pygame.draw.rect(self._screen, sprites.BLUE,
+                             (left + (floor - 1) * floor_width,
+                              top + height - bar, max(1.0, floor_width), bar))
+        for elevator in self._elevators:
+            x = left + (elevator.current_floor - 0.5) * floor_width
+            pygame.draw.rect(self._screen, sprites.DARK_GREEN,
+                             (x - 2, top + height - 8, 4, 8))
+        pygame.draw.rect(self._screen, sprites.BLACK,
+                         (left, top, width, height), 1)
+
+    def render(self) -> None:
+        """Draw the current state of the simulation to the whole screen.
+        """
+        if not self._visualize:
+            return
+
+        # Need this on OSX due to pygame bug
+        pygame.event.peek(0)
+        if self._handle_keys():
+            self._draw_background()
+
+        offset = self._offset()
+        self._screen.blit(self._background, (0, 0))
+        self._screen.set_clip(self._view.move(0, -offset))
+        for i in self._view.collidelistall(self._drawn_rects):
+            sprite = self._drawn[i]
+            if isinstance(sprite, sprites.PersonSprite):
+                sprite.refresh_image()
+            self._screen.blit(sprite.image, sprite.rect.move(0, -offset))
+        self._screen.set_clip(None)
+        self._draw_header()
+        self._clock.tick(self._fps)
+        pygame.display.flip()
+
+    def _render_dirty(self, dirty: List[pygame.Rect],
+                      header: bool = False) -> None:
+        """Draw one frame, redrawing and updating only the given parts of the
+        building, and the stats window if header is True.
+
+        Each part in view is redrawn from the background up, with every
+        sprite that overlaps it, in the order the sprites are normally drawn.
+        Overlapping parts (such as people walking side by side) are merged
+        first, so the sprites in them are only drawn once. If the viewport
+        has been scrolled, the whole screen is redrawn instead.
+        """
+        # Need this on OSX due to pygame bug
+        pygame.event.peek(0)
+        if self._handle_keys():
+            self._draw_background()
+            self.render()
+            return
+
+        merged = []
+        for rect in dirty:
+            rect = rect.clip(self._view)
+            if rect.width == 0 or rect.height == 0:
+                continue
+            i = rect.collidelist(merged)
+            if i == -1:
+                merged.append(rect)
+            else:
+                merged[i].union_ip(rect)
+
+        offset = self._offset()
+        updated = []
+        for rect in merged:
+            screen_rect = rect.move(0, -offset)
+            self._screen.set_clip(screen_rect)
+            self._screen.blit(self._background, screen_rect, screen_rect)
+            for i in rect.collidelistall(self._drawn_rects):
+                self._screen.blit(self._drawn[i].image,
+                                  self._drawn_rects[i].move(0, -offset))
+            updated.append(screen_rect)
+        self._screen.set_clip(None)
+        if header:
+            self._draw_header()
+            updated.append(pygame.Rect(0, 0, WIDTH, STAT_WINDOW_HEIGHT))
+        self._clock.tick(self._fps)
+        pygame.display.update(updated)
+
+    def _add_sprite(self, sprite: pygame.sprite.Sprite) -> None:
+        """Draw the given sprite from now on, on top of the sprites already
+        drawn, unless it is already drawn.
+        """
+        if not self._sprite_group.has(sprite):
+            self._sprite_group.add(sprite)
+            self._drawn.append(sprite)
+            self._drawn_rects.append(sprite.rect)
+
+    def _remove_sprites(self, removed: List[pygame.sprite.Sprite]) -> None:
+        """Stop drawing the given sprites."""
+        self._sprite_group.remove(removed)
+        removed_ids = {id(sprite) for sprite in removed}
+        self._drawn = [sprite for sprite in self._drawn
+                       if id(sprite) not in removed_ids]
+        self._drawn_rects = [sprite.rect for sprite in self._drawn]
+
+    def _animate(self, moves: List[Tuple[pygame.sprite.Sprite, int, int]],
+                 frames: int, changed: List[pygame.Rect]) -> None:
+        """Move each sprite horizontally from its start x-coordinate to its
+        target x-coordinate, all at the same time, in <frames> + 1 frames.
+
+        Each move is a sprite, its start and its target. The given parts of
+        the building, which have changed since the last frame, are redrawn in
+        the first frame.
+        """
+        for frame in range(frames + 1):
+            dirty = changed if frame == 0 else []
+            for sprite, from_x, target_x in moves:
+                old_rect = sprite.rect.copy()
+                sprite.rect.centerx = \
+                    from_x + (target_x - from_x) * frame // frames
+                dirty.append(old_rect.union(sprite.rect))
+            self._render_dirty(dirty)
+
+    def show_arrivals(self,
+                      arrivals: Dict[int, List[sprites.PersonSprite]]) -> None:
+        """Show new arrivals.
+
+        <arrivals> holds everyone waiting on each floor; people who are
+        already shown are left where they are.
+        """
+        if not self._visualize:
+            return
+
+        self._waiting = arrivals
+        x = 10
+        dirty = []
+        for floor, people in arrivals.items():
+            y = self.get_y_of_floor(floor)
+            for person in people:
+                if self._sprite_group.has(person):
+                    continue
+                person.rect.bottom = y
+                person.rect.centerx = x + random.randint(-3, 3)
+                self._add_sprite(person)
+                dirty.append(person.rect)
+        self._render_dirty(dirty, header=True)
+
+    def show_boarding(self, person: sprites.PersonSprite,
+                      elevator: sprites.ElevatorSprite) -> None:
+        """Show boarding of the given person onto the given elevator.
+
+        Precondition: the given person is on the same floor as the elevator.
+        """
+        self.show_boardings([(person, elevator)])
+
+    def show_boardings(self, boardings: List[Tuple[sprites.PersonSprite,
+                                                   sprites.ElevatorSprite]]
+                       ) -> None:
+        """Show everyone in the given list of people and the elevators they
+        boarded boarding at the same time.
+
+        Precondition: each person is on the same floor as their elevator.
+        """
+        if not self._visualize or len(boardings) == 0:
+            return
+
+        from_x = 10
+        self._animate([(person,
+                        from_x,
+                        elevator.rect.centerx + random.randint(-3, 3))
+                       for person, elevator in boardings],
+                      ANIMATION_FRAMES, [])
+
+        elevators = {id(elevator): elevator for _, elevator in boardings}
+        for elevator in elevators.values():
+            elevator.update()
+        self._render_dirty([elevator.rect for elevator in elevators.values()],
+                           header=True)
+
+    def show_disembarking(self, person: sprites.PersonSprite,
+                          elevator: sprites.ElevatorSprite) -> None:
+        """Show disembarking of the given person from the given elevator."""
+        self.show_disembarkings([(person, elevator)])
+
+    def show_disembarkings(self,
+                           disembarkings: List[Tuple[sprites.PersonSprite,
+                                                     sprites.ElevatorSprite]]
+                           ) -> None:
+        """Show everyone in the given list of people and the elevators they
+        left leaving at the same time.
+
+        Once they have walked off, they are no longer drawn, so the people
+        drawn (and looked through each frame) are only the ones still in the
+        building.
+        """
+        if not self._visualize or len(disembarkings) == 0:
+            return
+
+        target_x = WIDTH - 10
+        elevators = {id(elevator): elevator for _, elevator in disembarkings}
+        for elevator in elevators.values():
+            elevator.update()
+
+        self._animate([(person, person.rect.centerx, target_x)
+                       for person, _ in disembarkings],
+                      ANIMATION_FRAMES,
+                      [elevator.rect.copy() for elevator in elevators.values()])
+        self._remove_sprites([person for person, _ in disembarkings])
+        self._render_dirty([person.rect for person, _ in disembarkings])
+
+    def show_elevator_moves(self,
+                            elevators: List['Elevator'],
+                            directions: List[Direction]) -> None:
+        """Show elevator moves. Note that all the elevators move at once."""
+        if not self._visualize:
+            return
+
+        moving = []
+        for elevator, direction in zip(elevators, directions):
+            if direction == Direction.UP:
+                moving.append((elevator, - FLOOR_HEIGHT / ANIMATION_FRAMES))
+            elif direction == Direction.DOWN:
+                moving.append((elevator, FLOOR_HEIGHT / ANIMATION_FRAMES))
+
+        for frame in range(1, ANIMATION_FRAMES + 1):
+            dirty = []
+            for elevator, step in moving:
+                for sprite in [elevator] + elevator.passengers:
+                    old_rect = sprite.rect.copy()
+                    sprite.rect.bottom += step
+                    dirty.append(old_rect.union(sprite.rect))
+            # The overview shows the elevators at their new floors
+            self._render_dirty(dirty, header=frame == ANIMATION_FRAMES)
+
+    def show_state(self, elevators: List[sprites.ElevatorSprite],
+                   waiting: Dict[int, List[sprites.PersonSprite]]) -> None:
+        """Show every elevator and passenger at its current floor, and
+        everyone waiting on their floor, without animating how they got
+        there.
+        """
+        if not self._visualize:
+            return
+
+        # Stop drawing anyone who has left since they were last shown.
+        shown = {id(elevator) for elevator in elevators}
+        for elevator in elevators:
+            shown.update(id(passenger) for passenger in elevator.passengers)
+        for people in waiting.values():
+            shown.update(id(person) for person in people)
+        self._remove_sprites([sprite for sprite in self._drawn
+                              if id(sprite) not in shown])
+
+        for elevator in elevators:
+            elevator.rect.bottom = self.get_y_of_floor(elevator.current_floor)
+            elevator.update()
+            for passenger in elevator.passengers:
+                passenger.rect.bottom = elevator.rect.bottom
+                passenger.rect.centerx = \
+                    elevator.rect.centerx + random.randint(-3, 3)
+                self._add_sprite(passenger)
+        self.show_arrivals(waiting)
+        self._follow_elevator()
+        self._draw_background()
+        self.render()
+
+    def wait(self, wait_time: float) -> None:
+        """Wait for the specified amount of time, in seconds.
+
+        Only occurs if self.visualize is true, otherwise there's no need to
+        wait.
+        """
+        if self._visualize:
+            time.sleep(wait_time / self._speed)
+
+    def _setup_sprites(self, elevators: List[sprites.ElevatorSprite]) -> None:
+        """Set up the initial sprites for this visualization.
+
+        Position them on the screen and spaces them based on:
+            Size of the screen
+            Number of each item
+
+        The floors never move, so the ones in view are drawn onto the
+        background (see _draw_background) instead of being kept as sprites.
+        """
+        for i, elevator in enumerate(elevators):
+            elevator.rect.centerx =\
+                (i + 1) * WIDTH // (self._num_elevators + 1)
+            elevator.rect.bottom = self._total_height() - FLOOR_BORDER_HEIGHT
+
+            self._add_sprite(elevator)
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'extra-imports': ['random', 'pygame', 'time', 'algorithms',
+                          'occupancy'],
+        'generated-members': 'pygame.*'
+    })